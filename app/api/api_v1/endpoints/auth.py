@@ -337,6 +337,7 @@ async def google_auth(
 @router.post("/send-verification", response_model=dict)
 def send_verification(
     request: EmailVerificationRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(deps.get_db),
 ) -> dict:
     """
@@ -353,8 +354,12 @@ def send_verification(
     # 인증 코드 생성 및 저장
     verification = crud_email_verification.create_email_verification(db, request.email)
     
-    # 이메일 전송
-    send_verification_email(request.email, verification.verification_code)
+    # 이메일 전송 (비동기)
+    background_tasks.add_task(
+        send_verification_email,
+        request.email,
+        verification.verification_code
+    )
     
     return {"message": "인증 코드가 이메일로 전송되었습니다."}
 
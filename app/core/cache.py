@@ -12,8 +12,12 @@ import pickle
 import hashlib
 import time
 import asyncio
+import threading
+from collections import OrderedDict
 from typing import Any, Optional, Union, Dict, List, Tuple, Callable
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
 from app.core.config import settings
 import logging
@@ -22,6 +26,36 @@ logger = logging.getLogger(__name__)
 
 # --- 기본 캐시 관리자 ---
 
+# 엔티티별 키 인덱스 SET (무효화 시 전체 키스페이스 SCAN 대신 사용)
+INDEX_PREFIX = "idx"
+INDEX_FIELDS = ("user_id", "project_id", "room_id")
+INDEX_TTL = 604800  # 7일 (가장 긴 캐시 TTL과 동일)
+# 인덱스에는 이미 만료된 키도 남으므로 마지막 정리 후 이만큼 커질 때마다 죽은 멤버를 정리
+INDEX_PRUNE_SIZE = 1000
+INDEX_PRUNE_BATCH = 500
+INDEX_PRUNE_MARKS_MAX = 10000  # 정리 기준 크기를 기억할 최대 인덱스 수
+
+# 캐시 키 해시 길이 (blake2b 10바이트 = 기존 sha256 앞 20자리와 같은 길이의 hex)
+KEY_DIGEST_SIZE = 10
+
+
+def _index_keys_for(params: Dict[str, Any]) -> List[str]:
+    """kwargs에서 user_id/project_id/room_id를 찾아 인덱스 SET 이름 목록 생성"""
+    return [
+        CacheManager.index_key(field[:-3], params[field])
+        for field in INDEX_FIELDS
+        if params.get(field) is not None
+    ]
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
 class CacheManager:
     """Redis 기반 통합 캐시 관리자"""
     def __init__(self):
@@ -44,17 +78,36 @@ class CacheManager:
             self.redis_client = None
         
         self.default_ttl = 1800  # 30분
+        # 인덱스 정리는 요청 경로 밖의 단일 워커 스레드에서 수행
+        # (인덱스별 마지막 정리 후 크기를 기억해 두고, 그보다 INDEX_PRUNE_SIZE 이상 커지면 정리)
+        self._index_prune_marks: Dict[str, int] = {}
+        self._pruning_indexes: set = set()
+        self._prune_lock = threading.Lock()
+        self._prune_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-index-prune")
 
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         key_data = f"{prefix}:{str(args)}:{str(sorted(kwargs.items()))}"
         return f"{prefix}:{hashlib.md5(key_data.encode()).hexdigest()}"
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    @staticmethod
+    def index_key(kind: str, entity_id: Any) -> str:
+        """엔티티(user/project/room)별 키 인덱스 SET의 이름"""
+        return f"{INDEX_PREFIX}:{kind}:{entity_id}"
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, index_keys: Optional[List[str]] = None) -> bool:
         if not self.redis_client: return False
         try:
             ttl = ttl or self.default_ttl
             serialized_value = pickle.dumps(value)
-            return self.redis_client.setex(key, ttl, serialized_value)
+            if not index_keys:
+                return self.redis_client.setex(key, ttl, serialized_value)
+            # 값 저장과 인덱스 등록을 한 번의 왕복으로 처리
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, ttl, serialized_value)
+            self._queue_index_adds(pipe, key, index_keys)
+            results = pipe.execute()
+            self._prune_grown_indexes(index_keys, results[1:])
+            return bool(results[0])
         except Exception as e:
             logger.error(f"Cache set error for key '{key}': {e}")
             return False
@@ -68,6 +121,26 @@ class CacheManager:
             logger.error(f"Cache get error for key '{key}': {e}")
             return None
 
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None, index_keys: Optional[Dict[str, List[str]]] = None) -> bool:
+        """여러 키를 파이프라인 한 번으로 저장 (키마다 동일한 TTL, index_keys는 키별 인덱스 SET 목록)"""
+        if not self.redis_client or not items: return False
+        try:
+            ttl = ttl or self.default_ttl
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, pickle.dumps(value))
+            added: List[str] = []
+            if index_keys:
+                for key, keys in index_keys.items():
+                    self._queue_index_adds(pipe, key, keys)
+                    added.extend(keys)
+            results = pipe.execute()
+            self._prune_grown_indexes(added, results[len(items):])
+            return all(results[:len(items)])
+        except Exception as e:
+            logger.error(f"Cache set_many error for {len(items)} keys: {e}")
+            return False
+
     def delete(self, key: str) -> bool:
         if not self.redis_client: return False
         try:
@@ -76,6 +149,76 @@ class CacheManager:
             logger.error(f"Cache delete error for key '{key}': {e}")
             return False
 
+    @staticmethod
+    def _queue_index_adds(pipe, key: str, index_keys: List[str]) -> None:
+        """파이프라인에 인덱스 등록 명령 추가 (인덱스마다 SADD, EXPIRE, SCARD 순서)"""
+        for index_key in index_keys:
+            pipe.sadd(index_key, key)
+            pipe.expire(index_key, INDEX_TTL)
+            pipe.scard(index_key)
+
+    def _prune_grown_indexes(self, index_keys: List[str], results: List[Any]) -> None:
+        """_queue_index_adds 결과의 SCARD 값을 보고 마지막 정리 이후 크게 자란 인덱스만 백그라운드 정리 예약"""
+        for index_key, size in zip(index_keys, results[2::3]):
+            if not size:
+                continue
+            with self._prune_lock:
+                if (index_key in self._pruning_indexes
+                        or size < self._index_prune_marks.get(index_key, 0) + INDEX_PRUNE_SIZE):
+                    continue
+                self._pruning_indexes.add(index_key)
+            self._prune_executor.submit(self._prune_in_background, index_key)
+
+    def _prune_in_background(self, index_key: str) -> None:
+        remaining = 0
+        try:
+            self.prune_index(index_key)
+            remaining = self.redis_client.scard(index_key)
+        except Exception as e:
+            logger.error(f"Cache prune index error for '{index_key}': {e}")
+        finally:
+            with self._prune_lock:
+                self._pruning_indexes.discard(index_key)
+                marks = self._index_prune_marks
+                marks.pop(index_key, None)
+                marks[index_key] = remaining
+                if len(marks) > INDEX_PRUNE_MARKS_MAX:
+                    marks.pop(next(iter(marks)))
+
+    def prune_index(self, index_key: str) -> int:
+        """인덱스 SET에서 데이터가 이미 만료된 키를 제거 (SSCAN으로 나눠 확인)"""
+        if not self.redis_client: return 0
+        try:
+            removed = 0
+            cursor = 0
+            while True:
+                cursor, members = self.redis_client.sscan(index_key, cursor, count=INDEX_PRUNE_BATCH)
+                if members:
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    for member in members:
+                        pipe.exists(member)
+                    stale = [member for member, alive in zip(members, pipe.execute()) if not alive]
+                    if stale:
+                        removed += self.redis_client.srem(index_key, *stale)
+                if cursor == 0:
+                    return removed
+        except Exception as e:
+            logger.error(f"Cache prune index error for '{index_key}': {e}")
+            return 0
+
+    def clear_index(self, index_key: str) -> int:
+        """인덱스 SET에 등록된 키들과 인덱스 자신을 삭제 (키스페이스 스캔 없음)"""
+        if not self.redis_client: return 0
+        try:
+            keys = self.redis_client.smembers(index_key)
+            if keys:
+                self.redis_client.unlink(*keys, index_key)
+                return len(keys)
+            return 0
+        except Exception as e:
+            logger.error(f"Cache clear index error for '{index_key}': {e}")
+            return 0
+
     def clear_pattern(self, pattern: str) -> int:
         if not self.redis_client: return 0
         try:
@@ -147,7 +290,7 @@ def cache_response(ttl: int = 3600, key_prefix: str = "api"):
                 return cached_result
             
             result = await func(*args, **kwargs)
-            cache_manager.set(cache_key, result, ttl)
+            cache_manager.set(cache_key, result, ttl, index_keys=_index_keys_for(kwargs))
             return result
         return wrapper
     return decorator
@@ -182,37 +325,118 @@ class EmbeddingCache:
         self.cache = cache
 
     def _get_key(self, text: str, model: str) -> str:
-        text_hash = hashlib.sha256(text.encode()).hexdigest()
-        return f"{self.PREFIX}:{model}:{text_hash[:20]}"
+        text_hash = hashlib.blake2b(text.encode(), digest_size=KEY_DIGEST_SIZE).hexdigest()
+        return f"{self.PREFIX}:{model}:{text_hash}"
+
+    @staticmethod
+    def _pack(embedding: Any) -> Any:
+        # float 리스트를 pickle하면 원소당 ~9바이트이므로 float32 바이트열(원소당 4바이트)로 저장
+        if isinstance(embedding, (list, tuple)) and embedding:
+            return np.asarray(embedding, dtype=np.float32).tobytes()
+        return embedding
+
+    @staticmethod
+    def _unpack(cached: Optional[Dict[str, Any]]) -> Optional[List[float]]:
+        if not cached:
+            return None
+        embedding = cached.get("embedding")
+        if isinstance(embedding, bytes):
+            return np.frombuffer(embedding, dtype=np.float32).tolist()
+        return embedding  # 이전 형식(리스트) 항목
 
     def get(self, text: str, model: str) -> Optional[List[float]]:
         key = self._get_key(text, model)
-        cached = self.cache.get(key)
-        return cached.get("embedding") if cached else None
+        return self._unpack(self.cache.get(key))
 
-    def set(self, text: str, model: str, embedding: List[float]):
-        key = self._get_key(text, model)
-        cache_data = {
-            "embedding": embedding,
+    def _build_entry(self, text: str, model: str, embedding: List[float]) -> Dict[str, Any]:
+        return {
+            "embedding": self._pack(embedding),
             "model": model,
             "text_length": len(text),
             "created_at": time.time()
         }
-        self.cache.set(key, cache_data, self.DEFAULT_TTL)
+
+    def set(self, text: str, model: str, embedding: List[float]):
+        key = self._get_key(text, model)
+        self.cache.set(key, self._build_entry(text, model, embedding), self.DEFAULT_TTL)
 
 class ResponseCache:
     """AI 응답 캐싱"""
     PREFIX = "ai_response_v2"
     DEFAULT_TTL = 3600 # 1시간
+    WRITE_QUEUE_SIZE = 1000  # 쓰기 대기열 최대 길이 (가득 차면 요청 경로에서 직접 기록)
+    WRITE_BATCH = 64  # 파이프라인 한 번에 기록할 최대 항목 수
 
     def __init__(self, cache: CacheManager):
         self.cache = cache
+        # 응답 저장은 요청 경로에서 Redis 왕복을 기다리지 않도록 백그라운드 워커가 모아서 기록
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def start_writer(self) -> None:
+        """응답 캐시 쓰기 워커 시작 (애플리케이션 startup 이벤트에서 호출)"""
+        if self._writer is not None or not self.cache.redis_client:
+            return
+        self._write_queue = asyncio.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+        self._writer = asyncio.create_task(self._drain_writes(self._write_queue))
+
+    async def stop_writer(self) -> None:
+        """대기 중인 쓰기를 모두 기록한 뒤 워커 종료"""
+        queue, writer = self._write_queue, self._writer
+        self._write_queue = None
+        self._writer = None
+        if writer is None:
+            return
+        await queue.put(None)  # 종료 표시
+        try:
+            await writer
+        except Exception as e:
+            logger.error(f"Response cache writer stop error: {e}")
+
+    async def _drain_writes(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.WRITE_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            stopping = None in batch
+            # 같은 키에 대한 중복 쓰기는 마지막 값만 남김
+            items: Dict[str, Any] = {}
+            index_keys: Dict[str, List[str]] = {}
+            for entry in batch:
+                if entry is None:
+                    continue
+                key, cache_data, keys = entry
+                items[key] = cache_data
+                if keys:
+                    index_keys[key] = keys
+            if items:
+                try:
+                    await asyncio.to_thread(self.cache.set_many, items, self.DEFAULT_TTL, index_keys)
+                except Exception as e:
+                    logger.error(f"Response cache write error for {len(items)} keys: {e}")
+            if stopping:
+                return
 
     def _get_key(self, messages: List[Dict[str, str]], model: str, system_prompt: Optional[str] = None) -> str:
-        content = {"messages": messages, "model": model, "system_prompt": system_prompt}
-        content_str = json.dumps(content, sort_keys=True)
-        content_hash = hashlib.sha256(content_str.encode()).hexdigest()
-        return f"{self.PREFIX}:{content_hash[:20]}"
+        # 전체 대화를 json.dumps로 한 번에 직렬화하지 않고 필드 단위로 해시에 흘려 넣음
+        # (필드 \x1f, 항목 \x1e, 메시지 \x1d 구분자로 경계를 명확히 해 충돌 방지)
+        h = hashlib.blake2b(digest_size=KEY_DIGEST_SIZE)
+        update = h.update
+        update(model.encode())
+        update(b"\x1d")
+        if system_prompt is not None:
+            update(b"\x01")
+            update(system_prompt.encode())
+        update(b"\x1d")
+        for message in messages:
+            for field in sorted(message):
+                value = message[field]
+                update(field.encode())
+                update(b"\x1f")
+                update((value if isinstance(value, str) else json.dumps(value, sort_keys=True)).encode())
+                update(b"\x1e")
+            update(b"\x1d")
+        return f"{self.PREFIX}:{h.hexdigest()}"
 
     def get(self, messages: List[Dict[str, str]], model: str, system_prompt: Optional[str] = None) -> Optional[str]:
         key = self._get_key(messages, model, system_prompt)
@@ -229,26 +453,66 @@ class ResponseCache:
             "created_at": time.time(),
             "metadata": metadata or {}
         }
-        self.cache.set(key, cache_data, self.DEFAULT_TTL)
+        index_keys = _index_keys_for(metadata or {})
+        # asyncio.Queue는 스레드 안전하지 않으므로 이벤트 루프 안에서 호출된 경우에만 대기열 사용
+        if self._write_queue is not None and _in_event_loop():
+            try:
+                self._write_queue.put_nowait((key, cache_data, index_keys))
+                return
+            except asyncio.QueueFull:
+                pass
+        self.cache.set(key, cache_data, self.DEFAULT_TTL, index_keys=index_keys)
 
 class TokenCache:
     """토큰 계산 결과 캐싱"""
     PREFIX = "token_cache"
     DEFAULT_TTL = 86400 # 24시간
+    LOCAL_MAXSIZE = 10000  # 프로세스 로컬 LRU 최대 항목 수
 
     def __init__(self, cache: CacheManager):
         self.cache = cache
+        # (text, model)에 대한 토큰 수는 변하지 않으므로 Redis 앞에 프로세스 로컬 LRU를 둔다
+        # 값은 (만료 monotonic 시각, token_counts) 튜플로 저장해 Redis TTL과 동일하게 만료
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, int]]]" = OrderedDict()
+        self._local_lock = threading.Lock()
 
     def _get_key(self, text: str, model: str) -> str:
-        text_hash = hashlib.sha256(text.encode()).hexdigest()
-        return f"{self.PREFIX}:{model}:{text_hash[:20]}"
+        text_hash = hashlib.blake2b(text.encode(), digest_size=KEY_DIGEST_SIZE).hexdigest()
+        return f"{self.PREFIX}:{model}:{text_hash}"
+
+    def _get_local(self, key: str) -> Optional[Dict[str, int]]:
+        with self._local_lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+        # 호출 측에서 결과를 수정해도 캐시가 오염되지 않도록 복사본 반환
+        return dict(entry[1])
+
+    def _set_local(self, key: str, token_counts: Dict[str, int]):
+        entry = (time.monotonic() + self.DEFAULT_TTL, dict(token_counts))
+        with self._local_lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            if len(self._local) > self.LOCAL_MAXSIZE:
+                self._local.popitem(last=False)
 
     def get(self, text: str, model: str) -> Optional[Dict[str, int]]:
         key = self._get_key(text, model)
-        return self.cache.get(key)
+        token_counts = self._get_local(key)
+        if token_counts is not None:
+            return token_counts
+        token_counts = self.cache.get(key)
+        if token_counts:
+            self._set_local(key, token_counts)
+        return token_counts
 
     def set(self, text: str, model: str, token_counts: Dict[str, int]):
         key = self._get_key(text, model)
+        self._set_local(key, token_counts)
         self.cache.set(key, token_counts, self.DEFAULT_TTL)
 
 class DatabaseCache:
@@ -269,29 +533,47 @@ class DatabaseCache:
 
     def set(self, query_type: str, result: Any, ttl: Optional[int] = None, **kwargs):
         key = self._get_key(query_type, **kwargs)
-        self.cache.set(key, result, ttl or self.DEFAULT_TTL)
+        self.cache.set(key, result, ttl or self.DEFAULT_TTL, index_keys=_index_keys_for(kwargs))
 
 # --- 캐시 통계 및 관리 ---
 
 class CacheStats:
     """캐시 통계 조회"""
+    STATS_TTL = 5  # 초 - 대시보드 동시 요청을 한 번의 INFO 조회로 합침
+    INFO_SECTIONS = ("server", "clients", "memory", "stats", "keyspace")
+    _cached: Optional[Tuple[float, Dict[str, Any]]] = None
+
     @staticmethod
     def get_cache_stats() -> Dict[str, Any]:
         if not cache_manager.redis_client:
             return {"status": "disabled"}
+
+        cached = CacheStats._cached
+        now = time.monotonic()
+        if cached and now - cached[0] < CacheStats.STATS_TTL:
+            return cached[1]
+
         try:
-            redis_info = cache_manager.redis_client.info()
-            keyspace_info = redis_info.get('db0', {})
-            
-            return {
-                "redis_version": redis_info.get("redis_version"),
-                "uptime_in_seconds": redis_info.get("uptime_in_seconds"),
-                "connected_clients": redis_info.get("connected_clients"),
-                "used_memory_human": redis_info.get("used_memory_human"),
+            # 전체 INFO 대신 필요한 섹션만 한 번의 왕복으로 조회
+            pipe = cache_manager.redis_client.pipeline(transaction=False)
+            for section in CacheStats.INFO_SECTIONS:
+                pipe.info(section)
+            server, clients, memory, stats, keyspace = pipe.execute()
+            keyspace_info = keyspace.get('db0', {})
+            hits = stats.get('keyspace_hits', 0)
+            misses = stats.get('keyspace_misses', 0)
+
+            result = {
+                "redis_version": server.get("redis_version"),
+                "uptime_in_seconds": server.get("uptime_in_seconds"),
+                "connected_clients": clients.get("connected_clients"),
+                "used_memory_human": memory.get("used_memory_human"),
                 "total_keys": keyspace_info.get("keys"),
                 "expires": keyspace_info.get("expires"),
-                "hit_rate": (redis_info['keyspace_hits'] / (redis_info['keyspace_hits'] + redis_info['keyspace_misses'])) if (redis_info['keyspace_hits'] + redis_info['keyspace_misses']) > 0 else 0,
+                "hit_rate": (hits / (hits + misses)) if (hits + misses) > 0 else 0,
             }
+            CacheStats._cached = (now, result)
+            return result
         except Exception as e:
             logger.error(f"Could not get Redis stats: {e}")
             return {"error": str(e)}
@@ -302,17 +584,17 @@ class CacheInvalidator:
     def invalidate_user_cache(user_id: str):
         logger.info(f"Invalidating cache for user: {user_id}")
         auth_cache.invalidate_user_cache(user_id)
-        cache_manager.clear_pattern(f"api:get_projects_for_user*:{user_id}*")
+        cache_manager.clear_index(CacheManager.index_key("user", user_id))
 
     @staticmethod
     def invalidate_project_cache(project_id: str):
         logger.info(f"Invalidating cache for project: {project_id}")
-        cache_manager.clear_pattern(f"*:*{project_id}*")
+        cache_manager.clear_index(CacheManager.index_key("project", project_id))
         
     @staticmethod
     def invalidate_room_cache(room_id: str):
         logger.info(f"Invalidating cache for room: {room_id}")
-        db_cache.cache.clear_pattern(f"{DatabaseCache.PREFIX}:room_messages:*{room_id}*")
+        db_cache.cache.clear_index(CacheManager.index_key("room", room_id))
 
     @staticmethod
     def invalidate_all_cache():
@@ -321,6 +603,13 @@ class CacheInvalidator:
             cache_manager.redis_client.flushdb()
 
 # --- 전역 특수 캐시 인스턴스 --- 
+# 메모리 위급 시 유휴 키 정리(memory_manager) 대상 - 인덱스 SET이나 레이트 리밋 등 다른 키는 건드리지 않음
+EVICTABLE_KEY_PREFIXES = tuple(
+    f"{prefix}:" for prefix in (
+        EmbeddingCache.PREFIX, ResponseCache.PREFIX, TokenCache.PREFIX, DatabaseCache.PREFIX, "api"
+    )
+)
+
 auth_cache = AuthCache(cache_manager)
 embedding_cache = EmbeddingCache(cache_manager)
 response_cache = ResponseCache(cache_manager)
@@ -1,10 +1,23 @@
-from typing import Optional, List, Union
+from functools import cached_property, lru_cache
+from types import MappingProxyType
+from typing import Optional, Tuple
 from pydantic_settings import BaseSettings
-from pydantic import EmailStr, validator
+from pydantic import field_validator, model_validator
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# 발신자 주소 형식 검사 (email-validator 대신 단순 정규식 - 설정값 검증에는 충분)
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# BACKEND_CORS_ORIGINS_STR 미설정 시 기본 허용 출처
+DEFAULT_CORS_ORIGINS = (
+    "https://sungblab.com",
+    "https://www.sungblab.com",
+    "http://localhost:3000",
+)
+
 class Settings(BaseSettings):
     # API 설정
     PROJECT_NAME: str = "SungbLab AI API"
@@ -25,6 +38,11 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "WARNING"
     LOG_FORMAT: str = "%(levelname)s - %(name)s - %(message)s"
     LOG_FILE: Optional[str] = None
+    # True면 순환을 logrotate(copytruncate 등) 외부 도구에 맡기고 WatchedFileHandler 사용
+    # (여러 워커 프로세스가 같은 파일을 각자 순환하며 경쟁하지 않도록)
+    LOG_EXTERNAL_ROTATION: bool = False
+    # uvicorn 워커 프로세스 수 (start.sh의 --workers와 동일하게 사용)
+    WORKERS: int = 1
     
     # 시스템 모니터링 설정 (메모리 사용량 최소화)
     ENABLE_MEMORY_MANAGER: bool = False
@@ -46,8 +64,8 @@ class Settings(BaseSettings):
     SMTP_PORT: int
     SMTP_USER: str
     SMTP_PASSWORD: str
-    SMTP_TLS: bool
-    EMAILS_FROM_EMAIL: EmailStr
+    SMTP_TLS: bool = False  # pydantic이 "true"/"false"/"1"/"0" 문자열을 직접 bool로 변환
+    EMAILS_FROM_EMAIL: str
     EMAILS_FROM_NAME: str
 
     # Frontend URL
@@ -66,75 +84,72 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str
     GOOGLE_REDIRECT_URI: str
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        logger.info(f"Environment: {self.ENVIRONMENT}")
-
-    @validator("SQLALCHEMY_DATABASE_URL", pre=True)
-    def assemble_db_url(cls, v: Optional[str], values: dict) -> str:
-        if v:
-            return v
-        return values.get("DATABASE_URL", "")
-
-    @property
-    def BACKEND_CORS_ORIGINS(self) -> List[str]:
-        if self.BACKEND_CORS_ORIGINS_STR is None or self.BACKEND_CORS_ORIGINS_STR == "":
-            return [
-                "https://sungblab.com",
-                "https://www.sungblab.com",
-                "http://localhost:3000"
-            ]
-        if self.BACKEND_CORS_ORIGINS_STR == "*":
-            return ["*"]
-        return [i.strip() for i in self.BACKEND_CORS_ORIGINS_STR.split(",")]
+    @field_validator("EMAILS_FROM_EMAIL")
+    @classmethod
+    def validate_from_email(cls, v: str) -> str:
+        if not _EMAIL_RE.match(v):
+            raise ValueError("EMAILS_FROM_EMAIL must be a valid email address")
+        return v
+
+    @model_validator(mode="after")
+    def assemble_db_url(self) -> "Settings":
+        if not self.SQLALCHEMY_DATABASE_URL:
+            self.SQLALCHEMY_DATABASE_URL = self.DATABASE_URL
+        return self
 
-    @validator("SMTP_TLS", pre=True)
-    def parse_smtp_tls(cls, v):
-        if isinstance(v, bool):
-            return v
-        if isinstance(v, str):
-            return v.lower() == "true"
-        return False
+    @cached_property
+    def BACKEND_CORS_ORIGINS(self) -> Tuple[str, ...]:
+        # 시작 후 변하지 않는 값이므로 최초 접근 시 한 번만 파싱
+        if not self.BACKEND_CORS_ORIGINS_STR:
+            return DEFAULT_CORS_ORIGINS
+        if self.BACKEND_CORS_ORIGINS_STR == "*":
+            return ("*",)
+        return tuple(i.strip() for i in self.BACKEND_CORS_ORIGINS_STR.split(","))
 
     class Config:
         case_sensitive = True
         env_file = ".env"
 
-# Validation 설정
+# Validation 설정 (불변 상수 - 업로드/비밀번호 검증 경로에서 직접 import)
+# 파일 업로드 설정
+ALLOWED_FILE_EXTENSIONS = frozenset({
+    '.txt', '.pdf', '.csv', '.md', '.docx', '.doc', 
+    '.xlsx', '.xls', '.jpg', '.jpeg', '.png', '.gif', '.webp'
+})
+
+# 파일명에서 금지된 문자
+DANGEROUS_FILENAME_CHARS = ('<', '>', ':', '"', '|', '?', '*', '\0')
+
+# 약한 비밀번호 패턴
+COMMON_PASSWORD_PATTERNS = (
+    'password', '123456', 'qwerty', 'admin', 'user',
+    'test', 'guest', '000000', '111111'
+)
+
+# 파일 확장자와 MIME 타입 매핑
+EXTENSION_MIME_MAP = MappingProxyType({
+    '.txt': 'text/plain',
+    '.pdf': 'application/pdf',
+    '.csv': 'text/csv',
+    '.md': 'text/markdown',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.doc': 'application/msword',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.xls': 'application/vnd.ms-excel',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp'
+})
+
 class ValidationConfig:
     """입력 검증 관련 설정"""
     
-    # 파일 업로드 설정
-    ALLOWED_FILE_EXTENSIONS = {
-        '.txt', '.pdf', '.csv', '.md', '.docx', '.doc', 
-        '.xlsx', '.xls', '.jpg', '.jpeg', '.png', '.gif', '.webp'
-    }
-    
-    # 파일명에서 금지된 문자
-    DANGEROUS_FILENAME_CHARS = ['<', '>', ':', '"', '|', '?', '*', '\0']
-    
-    # 약한 비밀번호 패턴
-    COMMON_PASSWORD_PATTERNS = [
-        'password', '123456', 'qwerty', 'admin', 'user',
-        'test', 'guest', '000000', '111111'
-    ]
-    
-    # 파일 확장자와 MIME 타입 매핑
-    EXTENSION_MIME_MAP = {
-        '.txt': 'text/plain',
-        '.pdf': 'application/pdf',
-        '.csv': 'text/csv',
-        '.md': 'text/markdown',
-        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        '.doc': 'application/msword',
-        '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        '.xls': 'application/vnd.ms-excel',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.gif': 'image/gif',
-        '.webp': 'image/webp'
-    }
+    ALLOWED_FILE_EXTENSIONS = ALLOWED_FILE_EXTENSIONS
+    DANGEROUS_FILENAME_CHARS = DANGEROUS_FILENAME_CHARS
+    COMMON_PASSWORD_PATTERNS = COMMON_PASSWORD_PATTERNS
+    EXTENSION_MIME_MAP = EXTENSION_MIME_MAP
     
     # 텍스트 길이 제한
     MAX_CONTENT_LENGTH = 10000
@@ -145,5 +160,15 @@ class ValidationConfig:
     MIN_PASSWORD_LENGTH = 8
     MAX_PASSWORD_LENGTH = 128
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings 싱글톤 (FastAPI Depends 등에서 사용 - 모듈의 settings와 같은 인스턴스)"""
+    settings = Settings()
+    if settings.ENVIRONMENT != "production":
+        logger.debug("Environment: %s", settings.ENVIRONMENT)
+    return settings
+
+
+settings = get_settings()
+
 validation_config = ValidationConfig() 
\ No newline at end of file
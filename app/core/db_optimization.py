@@ -3,12 +3,13 @@
 """
 
 from __future__ import annotations
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import logging
 import time
 import asyncio
+import threading
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import event, text
 from app.core.config import settings
 from app.db.session import engine, SessionLocal
 from app.monitoring.metrics import MetricsCollector
@@ -22,35 +23,41 @@ class DatabaseOptimizer:
         self.connection_check_interval = 60  # 1분마다 체크
         self.slow_query_threshold = 1.0  # 1초 이상 느린 쿼리
         self.pool_warning_threshold = 0.7  # 70% 이상 사용시 경고
+        self.pool_status_ttl = 5  # 연결 풀 상태 캐시 유효 시간(초)
+        self._pool_status_cache: Optional[Tuple[float, Dict[str, Any]]] = None
         
     def get_connection_pool_status(self) -> Dict[str, Any]:
-        """연결 풀 상태 확인"""
-        if not settings.ENABLE_PERFORMANCE_MONITORING:
-            return {}
+        """연결 풀 상태 확인 (짧은 TTL로 캐싱)"""
+        now = time.monotonic()
+        if self._pool_status_cache and now - self._pool_status_cache[0] < self.pool_status_ttl:
+            return self._pool_status_cache[1]
         try:
             pool = engine.pool
-            return {
-                "pool_size": pool.size(),
-                "checked_in": pool.checkedin(),
-                "checked_out": pool.checkedout(),
-                "overflow": pool.overflow(),
-                "invalid": pool.invalid(),
-                "total_connections": pool.checkedout() + pool.checkedin(),
-                "usage_percentage": (pool.checkedout() / (pool.size() + pool.overflow())) * 100
+            size = pool.size()
+            checked_in = pool.checkedin()
+            overflow = pool.overflow()
+            checked_out = pool.checkedout()
+            # 연결이 아직 하나도 열리지 않은 경우(size + overflow == 0) 0으로 나누지 않도록 처리
+            capacity = size + overflow
+            status = {
+                "pool_size": size,
+                "checked_in": checked_in,
+                "checked_out": checked_out,
+                "overflow": overflow,
+                "total_connections": checked_out + checked_in,
+                "usage_percentage": (checked_out / capacity * 100) if capacity > 0 else 0.0
             }
+            self._pool_status_cache = (now, status)
+            return status
         except Exception as e:
             return {"error": str(e)}
     
     def check_pool_health(self) -> bool:
         """연결 풀 건강성 확인"""
-        if not settings.ENABLE_PERFORMANCE_MONITORING:
-            return True
         try:
             status = self.get_connection_pool_status()
             
-            # 메트릭 업데이트
-            if "total_connections" in status:
-                MetricsCollector.update_db_connections(status["total_connections"])
+            # 연결 수 메트릭은 풀 체크아웃/체크인 이벤트에서 갱신됨
             
             # 경고 체크
             if status.get("usage_percentage", 0) > self.pool_warning_threshold * 100:
@@ -64,14 +71,7 @@ class DatabaseOptimizer:
     
     def execute_with_monitoring(self, db: Session, query: str, params: Optional[Dict] = None) -> Any:
         """쿼리 실행 모니터링"""
-        if not settings.ENABLE_PERFORMANCE_MONITORING:
-            if params:
-                result = db.execute(text(query), params)
-            else:
-                result = db.execute(text(query))
-            return result
-
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             if params:
@@ -79,23 +79,21 @@ class DatabaseOptimizer:
             else:
                 result = db.execute(text(query))
             
-            execution_time = time.time() - start_time
-            
-            # 느린 쿼리 로깅
-            if execution_time > self.slow_query_threshold:
-                logger.warning(f"느린 쿼리 감지: {execution_time:.3f}초 - {query[:100]}...")
+            # 느린 쿼리 로깅 (WARNING이 꺼져 있으면 종료 시각도 읽지 않음)
+            if logger.isEnabledFor(logging.WARNING):
+                execution_time = time.perf_counter() - start_time
+                if execution_time > self.slow_query_threshold:
+                    logger.warning(f"느린 쿼리 감지: {execution_time:.3f}초 - {query[:100]}...")
             
             return result
             
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             logger.error(f"쿼리 실행 실패: {execution_time:.3f}초 - {str(e)}", exc_info=True)
             raise
     
     def get_active_connections(self) -> int:
         """활성 연결 수 확인"""
-        if not settings.ENABLE_PERFORMANCE_MONITORING:
-            return 0
         try:
             db = SessionLocal()
             try:
@@ -111,21 +109,21 @@ class DatabaseOptimizer:
     
     def kill_idle_connections(self, idle_minutes: int = 60) -> int:
         """유휴 연결 정리"""
-        if not settings.ENABLE_PERFORMANCE_MONITORING:
-            return 0
         try:
             db = SessionLocal()
             try:
-                # 1시간 이상 유휴 상태인 연결 종료
+                # idle_minutes 이상 유휴 상태인 연결 종료 (종료된 PID 목록 대신 개수만 반환)
                 result = db.execute(text("""
-                    SELECT pg_terminate_backend(pid)
-                    FROM pg_stat_activity
-                    WHERE state = 'idle'
-                    AND state_change < now() - interval '%s minutes'
-                    AND pid <> pg_backend_pid()
-                """), (idle_minutes,))
+                    SELECT count(*) FROM (
+                        SELECT pg_terminate_backend(pid)
+                        FROM pg_stat_activity
+                        WHERE state = 'idle'
+                        AND state_change < now() - make_interval(mins => :m)
+                        AND pid <> pg_backend_pid()
+                    ) t
+                """), {"m": idle_minutes})
                 
-                terminated_count = len(result.fetchall())
+                terminated_count = result.scalar() or 0
                 if terminated_count > 0:
                     logger.info(f"유휴 연결 {terminated_count}개 정리 완료")
                 
@@ -135,83 +133,86 @@ class DatabaseOptimizer:
         except Exception as e:
             logger.error(f"유휴 연결 정리 실패: {e}", exc_info=True)
             return 0
-    
-    def optimize_database_settings(self) -> bool:
-        """데이터베이스 설정 최적화"""
-        if not settings.ENABLE_PERFORMANCE_MONITORING:
-            return True
-        try:
-            db = SessionLocal()
-            try:
-                # 연결 관련 설정 조정
-                optimizations = [
-                    "SET statement_timeout = '30s'",  # 쿼리 타임아웃
-                    "SET idle_in_transaction_session_timeout = '60s'",  # 트랜잭션 유휴 타임아웃
-                    "SET tcp_keepalives_idle = 300",  # TCP keepalive
-                    "SET tcp_keepalives_interval = 30",
-                    "SET tcp_keepalives_count = 3"
-                ]
-                
-                for optimization in optimizations:
-                    db.execute(text(optimization))
-                
-                db.commit()
-                logger.info("데이터베이스 설정 최적화 완료")
-                return True
-                
-            finally:
-                db.close()
-        except Exception as e:
-            logger.error(f"데이터베이스 설정 최적화 실패: {e}", exc_info=True)
-            return False
+
+# 모니터링 비활성화 시 사용할 no-op 구현 (호출마다 설정값을 확인하지 않도록 메서드 자체를 교체)
+def _execute_without_monitoring(self, db: Session, query: str, params: Optional[Dict] = None) -> Any:
+    if params:
+        return db.execute(text(query), params)
+    return db.execute(text(query))
+
+# 모듈 로드 시 한 번만 확인
+PERFORMANCE_MONITORING_ENABLED = settings.ENABLE_PERFORMANCE_MONITORING
+
+if not PERFORMANCE_MONITORING_ENABLED:
+    DatabaseOptimizer.get_connection_pool_status = lambda self: {}
+    DatabaseOptimizer.check_pool_health = lambda self: True
+    DatabaseOptimizer.execute_with_monitoring = _execute_without_monitoring
+    DatabaseOptimizer.get_active_connections = lambda self: 0
+    DatabaseOptimizer.kill_idle_connections = lambda self, idle_minutes=60: 0
 
 # 전역 인스턴스
 db_optimizer = DatabaseOptimizer()
 
-def get_db_with_monitoring():
-    """모니터링이 포함된 DB 세션 생성"""
-    if not settings.ENABLE_PERFORMANCE_MONITORING:
+if PERFORMANCE_MONITORING_ENABLED:
+    def get_db_with_monitoring():
+        """모니터링이 포함된 DB 세션 생성"""
         db = SessionLocal()
         try:
+            # 연결 풀 상태 확인
+            db_optimizer.check_pool_health()
             yield db
         finally:
             db.close()
-    else:
+else:
+    def get_db_with_monitoring():
+        """DB 세션 생성 (모니터링 비활성화)"""
         db = SessionLocal()
         try:
-            # 연결 풀 상태 확인
-            db_optimizer.check_pool_health()
             yield db
         finally:
             db.close()
 
 def execute_query_with_timeout(db: Session, query: str, timeout: int = 30):
-    """타임아웃이 있는 쿼리 실행"""
-    if not settings.ENABLE_PERFORMANCE_MONITORING:
-        try:
-            db.execute(text(f"SET statement_timeout = '{timeout}s'"))
-            result = db.execute(text(query))
-            return result
-        except Exception as e:
-            logger.error(f"쿼리 타임아웃 또는 실행 실패: {e}", exc_info=True)
-            raise
-        finally:
-            db.execute(text("SET statement_timeout = DEFAULT"))
-    else:
-        try:
-            db.execute(text(f"SET statement_timeout = '{timeout}s'"))
-            result = db.execute(text(query))
-            return result
-        except Exception as e:
-            logger.error(f"쿼리 타임아웃 또는 실행 실패: {e}", exc_info=True)
-            raise
-        finally:
-            db.execute(text("SET statement_timeout = DEFAULT"))
+    """
+    타임아웃이 있는 쿼리 실행
+    SET LOCAL은 현재 트랜잭션이 끝나면 자동으로 원복되므로 별도의 DEFAULT 복원이 필요 없음
+    (기본 statement_timeout은 연결 생성 시 connect_args의 options로 지정됨)
+    """
+    try:
+        db.execute(text("SET LOCAL statement_timeout = :t"), {"t": f"{int(timeout)}s"})
+        return db.execute(text(query))
+    except Exception as e:
+        logger.error(f"쿼리 타임아웃 또는 실행 실패: {e}", exc_info=True)
+        raise
+
+# 연결 풀 이벤트 기반 계측 (폴링 없이 체크아웃/체크인 시점에 카운터 갱신)
+_checked_out_connections = 0
+_checked_out_lock = threading.Lock()
+
+def _on_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    global _checked_out_connections
+    with _checked_out_lock:
+        _checked_out_connections += 1
+        count = _checked_out_connections
+    MetricsCollector.update_db_connections(count)
+
+def _on_pool_checkin(dbapi_connection, connection_record):
+    global _checked_out_connections
+    with _checked_out_lock:
+        _checked_out_connections = max(_checked_out_connections - 1, 0)
+        count = _checked_out_connections
+    MetricsCollector.update_db_connections(count)
+
+if PERFORMANCE_MONITORING_ENABLED:
+    event.listen(engine, "checkout", _on_pool_checkout)
+    event.listen(engine, "checkin", _on_pool_checkin)
+
+# 비동기 백그라운드 모니터링 (pg_stat_activity 조회만 드물게 수행)
+DB_ACTIVITY_CHECK_INTERVAL = 600  # 10분
 
-# 비동기 백그라운드 모니터링
 async def monitor_database_performance():
     """데이터베이스 성능 모니터링 백그라운드 작업"""
-    if not settings.ENABLE_PERFORMANCE_MONITORING:
+    if not PERFORMANCE_MONITORING_ENABLED:
         return
     while True:
         try:
@@ -227,8 +228,8 @@ async def monitor_database_performance():
             if pool_status.get('usage_percentage', 0) > 70:
                 db_optimizer.kill_idle_connections(30)  # 30분 이상 유휴 연결 정리
             
-            await asyncio.sleep(60)  # 1분마다 체크
+            await asyncio.sleep(DB_ACTIVITY_CHECK_INTERVAL)
             
         except Exception as e:
             logger.error(f"DB 모니터링 오류: {e}", exc_info=True)
-            await asyncio.sleep(30)  # 오류 시 30초 후 재시도 
\ No newline at end of file
+            await asyncio.sleep(30)  # 오류 시 30초 후 재시도
@@ -1,67 +1,13 @@
-from typing import Any, Dict, Optional
-import emails
-from emails.template import JinjaTemplate
+from typing import Dict, Optional
+import asyncio
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formataddr
+import aiosmtplib
 from app.core.config import settings
 
-def send_email(
-    email_to: str,
-    subject: str,
-    html_template: str,
-    environment: dict[str, Any] = {},
-    text_template: Optional[str] = None,
-    headers: Dict[str, str] = None,
-) -> None:
-    """
-    이메일 전송 함수
-    """
-    # 기본 헤더 설정
-    default_headers = {
-        "X-Priority": "1",  # 높은 우선순위 설정
-        "X-MSMail-Priority": "High",
-        "Importance": "High",
-        "Reply-To": settings.EMAILS_FROM_EMAIL,
-    }
-    
-    # 사용자 정의 헤더가 있으면 기본 헤더와 병합
-    if headers:
-        default_headers.update(headers)
-    
-    message = emails.Message(
-        subject=subject,
-        html=JinjaTemplate(html_template),
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
-        headers=default_headers,
-    )
-    
-    # 텍스트 버전의 이메일 추가 (멀티파트 이메일은 스팸 필터링 통과율 향상)
-    if text_template:
-        message.body = JinjaTemplate(text_template)
-    
-    smtp_options = {
-        "host": settings.SMTP_HOST,
-        "port": settings.SMTP_PORT,
-        "user": settings.SMTP_USER,
-        "password": settings.SMTP_PASSWORD,
-        "tls": settings.SMTP_TLS,
-    }
-    
-    response = message.send(
-        to=email_to,
-        render=environment,
-        smtp=smtp_options,
-    )
-    
-    return response
-
-def send_reset_password_email(email_to: str, token: str) -> None:
-    """
-    비밀번호 재설정 이메일 전송
-    """
-    reset_link = f"{settings.FRONTEND_URL}/auth/reset-password?token={token}"
-    
-    subject = "Sungblab AI 비밀번호 재설정 안내"  # 스팸 표시어 '[' 제거
-    
-    html_template = """
+# 본문은 대부분 정적 마크업이고 치환 변수는 하나뿐이므로 템플릿 엔진 대신 str.format 사용
+_RESET_HTML_TEMPLATE = """
         <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
             <h2 style="color: #2563eb; margin-bottom: 20px;">비밀번호 재설정 안내</h2>
             
@@ -73,7 +19,7 @@ def send_reset_password_email(email_to: str, token: str) -> None:
             </p>
             
             <div style="margin: 30px 0;">
-                <a href="{{ reset_link }}" 
+                <a href="{reset_link}" 
                    style="background-color: #2563eb; 
                           color: white; 
                           padding: 12px 24px; 
@@ -102,15 +48,14 @@ def send_reset_password_email(email_to: str, token: str) -> None:
             </div>
         </div>
     """
-    
-    # 텍스트 버전 이메일 템플릿 추가
-    text_template = """
+
+_RESET_TEXT_TEMPLATE = """
 안녕하세요,
 
 Sungblab AI 계정의 비밀번호 재설정을 요청하셨습니다.
 아래 링크를 클릭하여 새로운 비밀번호를 설정하실 수 있습니다.
 
-{{ reset_link }}
+{reset_link}
 
 이 링크는 24시간 동안 유효합니다.
 비밀번호 재설정을 요청하지 않으셨다면 이 이메일을 무시하시면 됩니다.
@@ -120,32 +65,9 @@ Sungblab AI 팀
 
 © 2024 Sungblab AI. All rights reserved.
     """
-    
-    # 커스텀 헤더 추가
-    headers = {
-        "List-Unsubscribe": f"<mailto:{settings.EMAILS_FROM_EMAIL}?subject=unsubscribe>",
-        "X-Auto-Response-Suppress": "OOF, DR, RN, NRN, AutoReply"
-    }
-    
-    send_email(
-        email_to=email_to,
-        subject=subject,
-        html_template=html_template,
-        text_template=text_template,
-        environment={
-            "reset_link": reset_link,
-        },
-        headers=headers,
-    )
 
-def send_verification_email(email_to: str, verification_code: str) -> None:
-    """
-    이메일 인증 코드 전송
-    """
-    subject = "Sungblab AI 인증 코드 안내"  # 스팸 표시어 '[' 제거
-    
-    # HTML 템플릿 - 불필요한 스타일링 최소화하고 간결하게 수정
-    html_template = """
+# HTML 템플릿 - 불필요한 스타일링 최소화하고 간결하게 수정
+_VERIFY_HTML_TEMPLATE = """
         <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
             <h2 style="color: #2563eb; margin-bottom: 20px;">Sungblab AI 이메일 인증</h2>
             
@@ -165,7 +87,7 @@ def send_verification_email(email_to: str, verification_code: str) -> None:
                             letter-spacing: 3px;
                             color: #1f2937;
                             display: inline-block;">
-                    {{ verification_code }}
+                    {verification_code}
                 </div>
             </div>
             
@@ -187,15 +109,15 @@ def send_verification_email(email_to: str, verification_code: str) -> None:
             </div>
         </div>
     """
-    
-    # 텍스트 버전 이메일 템플릿 추가 (멀티파트 이메일로 스팸 필터 회피 가능성 증가)
-    text_template = """
+
+# 텍스트 버전 이메일 템플릿 (멀티파트 이메일로 스팸 필터 회피 가능성 증가)
+_VERIFY_TEXT_TEMPLATE = """
 안녕하세요,
 
 Sungblab AI 회원가입을 위한 인증 코드를 안내해 드립니다.
 아래 코드를 입력하여 인증을 완료해 주세요.
 
-인증 코드: {{ verification_code }}
+인증 코드: {verification_code}
 
 이 인증 코드는 10분 동안 유효합니다.
 회원가입을 요청하지 않으셨다면 이 메일을 무시하셔도 됩니다.
@@ -205,6 +127,103 @@ Sungblab AI 팀
 
 © 2025 Sungblab AI. All rights reserved.
     """
+
+_smtp_client: Optional[aiosmtplib.SMTP] = None
+_smtp_lock: Optional[asyncio.Lock] = None
+
+async def _get_smtp() -> aiosmtplib.SMTP:
+    """
+    SMTP 연결 재사용 (연결/TLS 핸드셰이크를 메일마다 반복하지 않음)
+    연결이 끊겨 있으면 새로 연결 후 로그인한다.
+    """
+    global _smtp_client
+    if _smtp_client is None or not _smtp_client.is_connected:
+        client = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            start_tls=settings.SMTP_TLS,
+        )
+        await client.connect()
+        await client.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        _smtp_client = client
+    return _smtp_client
+
+async def send_email(
+    email_to: str,
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None,
+    headers: Dict[str, str] = None,
+) -> None:
+    """
+    이메일 전송 함수 (aiosmtplib 사용 - 이벤트 루프를 막지 않음)
+    """
+    global _smtp_lock
+    
+    # 기본 헤더 설정
+    default_headers = {
+        "X-Priority": "1",  # 높은 우선순위 설정
+        "X-MSMail-Priority": "High",
+        "Importance": "High",
+        "Reply-To": settings.EMAILS_FROM_EMAIL,
+    }
+    
+    # 사용자 정의 헤더가 있으면 기본 헤더와 병합
+    if headers:
+        default_headers.update(headers)
+    
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = formataddr((settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL))
+    message["To"] = email_to
+    for name, value in default_headers.items():
+        message[name] = value
+    
+    # 텍스트 버전의 이메일 추가 (멀티파트 이메일은 스팸 필터링 통과율 향상)
+    # multipart/alternative는 마지막 파트를 우선하므로 텍스트를 먼저 붙인다
+    if text_content:
+        message.attach(MIMEText(text_content, "plain", "utf-8"))
+    message.attach(MIMEText(html_content, "html", "utf-8"))
+    
+    # 동일 SMTP 연결을 여러 작업이 동시에 쓰지 않도록 직렬화
+    if _smtp_lock is None:
+        _smtp_lock = asyncio.Lock()
+    async with _smtp_lock:
+        try:
+            smtp = await _get_smtp()
+            return await smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # 유휴 상태에서 서버가 연결을 끊은 경우 한 번 재연결 후 재시도
+            smtp = await _get_smtp()
+            return await smtp.send_message(message)
+
+async def send_reset_password_email(email_to: str, token: str) -> None:
+    """
+    비밀번호 재설정 이메일 전송
+    """
+    reset_link = f"{settings.FRONTEND_URL}/auth/reset-password?token={token}"
+    
+    subject = "Sungblab AI 비밀번호 재설정 안내"  # 스팸 표시어 '[' 제거
+    
+    # 커스텀 헤더 추가
+    headers = {
+        "List-Unsubscribe": f"<mailto:{settings.EMAILS_FROM_EMAIL}?subject=unsubscribe>",
+        "X-Auto-Response-Suppress": "OOF, DR, RN, NRN, AutoReply"
+    }
+    
+    await send_email(
+        email_to=email_to,
+        subject=subject,
+        html_content=_RESET_HTML_TEMPLATE.format(reset_link=reset_link),
+        text_content=_RESET_TEXT_TEMPLATE.format(reset_link=reset_link),
+        headers=headers,
+    )
+
+async def send_verification_email(email_to: str, verification_code: str) -> None:
+    """
+    이메일 인증 코드 전송
+    """
+    subject = "Sungblab AI 인증 코드 안내"  # 스팸 표시어 '[' 제거
     
     # 커스텀 헤더 추가
     headers = {
@@ -212,13 +231,10 @@ Sungblab AI 팀
         "X-Auto-Response-Suppress": "OOF, DR, RN, NRN, AutoReply"
     }
     
-    send_email(
+    await send_email(
         email_to=email_to,
         subject=subject,
-        html_template=html_template,
-        text_template=text_template,
-        environment={
-            "verification_code": verification_code,
-        },
+        html_content=_VERIFY_HTML_TEMPLATE.format(verification_code=verification_code),
+        text_content=_VERIFY_TEXT_TEMPLATE.format(verification_code=verification_code),
         headers=headers,
     ) 
\ No newline at end of file
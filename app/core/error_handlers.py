@@ -1,115 +1,216 @@
 from fastapi import Request, FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from fastapi.exceptions import RequestValidationError, HTTPException
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Union
+from typing import Dict, List, Optional, Tuple, Union
+import asyncio
 import logging
-import traceback
-from datetime import datetime
+import random
+from itertools import islice
+import time
 
 from app.core.exceptions import (
     APIError, ErrorCode, ErrorSeverity, 
     ValidationError, AuthenticationError, 
     create_error_response
 )
-from app.core.error_tracking import error_tracker
+from app.core.error_tracking import error_tracker, enqueue_capture, SENTRY_ENABLED
 
 from app.core.config import settings
 
+# 아래 핸들러들은 Starlette ExceptionMiddleware 안에서 실행되므로 외부 I/O를 await하지 않는다.
+# (Sentry 전송은 enqueue_capture로 백그라운드 큐에 넘김)
+
 # 구조화된 로거 초기화
 error_logger = logging.getLogger("error_handler")
 
-def setup_error_handlers(app: FastAPI) -> None:
-    """글로벌 에러 핸들러 설정"""
+# 검증 에러 응답에 포함할 최대 필드 에러 수
+_MAX_FIELD_ERRORS = 50
+
+# DB 에러 메시지 최대 길이 (쿼리 전문이 로그/Sentry 이벤트를 키우지 않도록)
+_MAX_DB_ERROR_LENGTH = 500
+
+# 모듈 로드 시 한 번만 확인
+_DEBUG = settings.DEBUG
+
+async def api_error_handler(request: Request, exc: APIError) -> Response:
+    """표준화된 API 에러 핸들러"""
     
-    @app.exception_handler(APIError)
-    async def api_error_handler(request: Request, exc: APIError) -> JSONResponse:
-        """표준화된 API 에러 핸들러"""
-        
-        # 에러 추적 및 로깅
-        await _log_and_track_error(request, exc, exc.severity)
-        
-        # 표준화된 에러 응답 반환
-        return create_error_response(exc)
+    # 에러 추적 및 로깅
+    await _log_and_track_error(request, exc, exc.severity)
     
-    @app.exception_handler(HTTPException)
-    async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
-        """기본 HTTP 에러를 APIError로 변환"""
-        
-        # 기존 HTTPException을 APIError로 변환
-        api_error = _convert_http_exception_to_api_error(exc)
-        
-        # 에러 추적 및 로깅
-        await _log_and_track_error(request, api_error, api_error.severity)
-        
-        return create_error_response(api_error)
+    # 표준화된 에러 응답 반환
+    return create_error_response(exc)
+
+async def http_exception_handler(request: Request, exc: HTTPException) -> Response:
+    """기본 HTTP 에러를 APIError로 변환"""
     
-    @app.exception_handler(StarletteHTTPException)
-    async def starlette_http_exception_handler(request: Request, exc: StarletteHTTPException) -> JSONResponse:
-        """Starlette HTTP 에러 핸들러"""
-        
-        # HTTPException으로 변환 후 처리
-        http_exc = HTTPException(status_code=exc.status_code, detail=str(exc.detail))
-        return await http_exception_handler(request, http_exc)
+    # 기존 HTTPException을 APIError로 변환
+    api_error = _convert_http_exception_to_api_error(exc)
     
-    @app.exception_handler(RequestValidationError)
-    async def validation_error_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
-        """Pydantic 검증 에러 핸들러"""
-        
-        # 필드별 에러 정보 추출
-        field_errors = []
-        for error in exc.errors():
-            field_errors.append({
-                "field": " -> ".join(str(x) for x in error["loc"]),
-                "message": error["msg"],
-                "type": error["type"]
-            })
-        
-        # ValidationError로 변환
-        api_error = ValidationError(
-            message="Request validation failed",
-            field_errors=field_errors
-        )
-        
-        # 에러 추적 및 로깅
-        await _log_and_track_error(request, api_error, ErrorSeverity.LOW)
-        
-        return create_error_response(api_error)
+    # 에러 추적 및 로깅
+    await _log_and_track_error(request, api_error, api_error.severity)
     
-    @app.exception_handler(SQLAlchemyError)
-    async def database_error_handler(request: Request, exc: SQLAlchemyError) -> JSONResponse:
-        """데이터베이스 에러 핸들러"""
-        
-        # 데이터베이스 에러를 APIError로 변환
-        api_error = APIError(
-            error_code=ErrorCode.DATABASE_ERROR,
-            detail=f"Database error: {str(exc)}",
-            status_code=500,
-            severity=ErrorSeverity.HIGH
-        )
-        
-        # 에러 추적 및 로깅
-        await _log_and_track_error(request, api_error, ErrorSeverity.HIGH)
-        
-        return create_error_response(api_error)
+    return create_error_response(api_error)
+
+async def starlette_http_exception_handler(request: Request, exc: StarletteHTTPException) -> Response:
+    """Starlette HTTP 에러 핸들러"""
     
-    @app.exception_handler(Exception)
-    async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
-        """일반 예외 핸들러 (마지막 안전장치)"""
-        
-        # 예상치 못한 에러를 APIError로 변환
-        api_error = APIError(
-            error_code=ErrorCode.INTERNAL_SERVER_ERROR,
-            message=f"Unexpected error: {str(exc)}" if settings.DEBUG else "Internal server error",
-            status_code=500,
-            severity=ErrorSeverity.CRITICAL
-        )
-        
-        # 에러 추적 및 로깅
-        await _log_and_track_error(request, api_error, ErrorSeverity.CRITICAL, original_exception=exc)
-        
-        return create_error_response(api_error)
+    # 중간 HTTPException 생성/핸들러 재호출 없이 바로 APIError로 변환
+    api_error = _convert_http_exception_to_api_error(exc)
+    
+    # 에러 추적 및 로깅
+    await _log_and_track_error(request, api_error, api_error.severity)
+    
+    return create_error_response(api_error)
+
+async def validation_error_handler(request: Request, exc: RequestValidationError) -> Response:
+    """Pydantic 검증 에러 핸들러"""
+    
+    # 필드별 에러 정보 추출 (중첩 모델 검증 시 응답이 과도하게 커지지 않도록 개수 제한)
+    field_errors = [
+        {
+            "field": " -> ".join(map(str, error["loc"])),
+            "message": error["msg"],
+            "type": error["type"]
+        }
+        for error in islice(exc.errors(), _MAX_FIELD_ERRORS)
+    ]
+    
+    # ValidationError로 변환
+    api_error = ValidationError(
+        detail="Request validation failed",
+        field_errors=field_errors
+    )
+    
+    # 에러 추적 및 로깅
+    await _log_and_track_error(request, api_error, ErrorSeverity.LOW)
+    
+    return create_error_response(api_error)
+
+async def database_error_handler(request: Request, exc: SQLAlchemyError) -> Response:
+    """데이터베이스 에러 핸들러"""
+    
+    # 데이터베이스 에러를 APIError로 변환
+    api_error = APIError(
+        error_code=ErrorCode.DATABASE_ERROR,
+        detail=f"Database error: {str(exc)[:_MAX_DB_ERROR_LENGTH]}",
+        status_code=500,
+        severity=ErrorSeverity.HIGH
+    )
+    
+    # 에러 추적 및 로깅
+    await _log_and_track_error(request, api_error, ErrorSeverity.HIGH)
+    
+    return create_error_response(api_error)
+
+async def general_exception_handler(request: Request, exc: Exception) -> Response:
+    """일반 예외 핸들러 (마지막 안전장치)"""
+    
+    # 예상치 못한 에러를 APIError로 변환
+    api_error = APIError(
+        error_code=ErrorCode.INTERNAL_SERVER_ERROR,
+        detail=f"Unexpected error: {exc}" if _DEBUG else "Internal server error",
+        status_code=500,
+        severity=ErrorSeverity.CRITICAL
+    )
+    
+    # 에러 추적 및 로깅
+    await _log_and_track_error(request, api_error, ErrorSeverity.CRITICAL, original_exception=exc)
+    
+    return create_error_response(api_error)
+
+def setup_error_handlers(app: FastAPI) -> None:
+    """글로벌 에러 핸들러 설정"""
+    app.add_exception_handler(APIError, api_error_handler)
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_exception_handler(StarletteHTTPException, starlette_http_exception_handler)
+    app.add_exception_handler(RequestValidationError, validation_error_handler)
+    app.add_exception_handler(SQLAlchemyError, database_error_handler)
+    app.add_exception_handler(Exception, general_exception_handler)
+
+# 심각도별 Sentry 전송 비율
+_SEVERITY_SAMPLE_RATE = {
+    ErrorSeverity.LOW: 0.01,
+    ErrorSeverity.MEDIUM: 0.1,
+    ErrorSeverity.HIGH: 1.0,
+    ErrorSeverity.CRITICAL: 1.0,
+}
+
+# 예외 전체를 Sentry로 보내는 심각도
+_HIGH_OR_CRITICAL = frozenset({ErrorSeverity.HIGH, ErrorSeverity.CRITICAL})
+
+# 4xx 응답 브레드크럼 기록 비율 (5xx는 항상 기록)
+_CLIENT_ERROR_BREADCRUMB_RATE = 0.1
+
+# 반복 에러 중복 제거 (장애 시 같은 에러가 분당 수천 번 발생하는 경우 대비)
+_DEDUP_WINDOW = 60.0  # 초
+_DEDUP_MAX_KEYS = 1024
+# (error_code, path) -> [윈도우 내 생략된 횟수, 윈도우 시작 시각]
+_recent_errors: Dict[Tuple[str, str], List[float]] = {}
+_dedup_flusher: Optional[asyncio.Task] = None
+
+def _report_suppressed(key: Tuple[str, str], count: float) -> None:
+    """윈도우 동안 생략된 에러 횟수를 집계 로그로 남김"""
+    if not count:
+        return
+    error_code, path = key
+    error_logger.warning(
+        f"Suppressed {int(count)} duplicate errors: {error_code} {path}",
+        extra={"error_code": error_code, "path": path, "suppressed_count": int(count)}
+    )
+
+def _is_duplicate_error(error_code: str, path: str) -> bool:
+    """윈도우 내에 이미 보고된 에러면 True. 윈도우가 지나면 생략된 횟수를 집계 로그로 남김"""
+    key = (error_code, path)
+    now = time.monotonic()
+    entry = _recent_errors.get(key)
+    if entry is not None and now - entry[1] < _DEDUP_WINDOW:
+        entry[0] += 1
+        return True
+    
+    if entry is not None:
+        _report_suppressed(key, entry[0])
+    elif len(_recent_errors) >= _DEDUP_MAX_KEYS:
+        # 가장 오래된 키 제거 (dict는 삽입 순서 유지) - 생략된 횟수는 버리지 않고 기록
+        oldest = next(iter(_recent_errors))
+        _report_suppressed(oldest, _recent_errors.pop(oldest)[0])
+    _recent_errors[key] = [0, now]
+    return False
+
+def flush_suppressed_errors(flush_all: bool = False) -> None:
+    """윈도우가 끝난 항목의 생략 횟수를 기록하고 제거 (flush_all이면 진행 중인 윈도우도 포함)"""
+    now = time.monotonic()
+    expired = [
+        key for key, entry in _recent_errors.items()
+        if flush_all or now - entry[1] >= _DEDUP_WINDOW
+    ]
+    for key in expired:
+        _report_suppressed(key, _recent_errors.pop(key)[0])
+
+async def _run_dedup_flusher() -> None:
+    # 장애가 끝나 같은 에러가 다시 오지 않아도 집계가 남도록 주기적으로 만료된 윈도우를 비움
+    while True:
+        await asyncio.sleep(_DEDUP_WINDOW)
+        try:
+            flush_suppressed_errors()
+        except Exception as e:
+            error_logger.error(f"Suppressed error flush failed: {e}")
+
+def start_dedup_flusher() -> None:
+    """중복 에러 집계 플러시 태스크 시작 (애플리케이션 startup 이벤트에서 호출)"""
+    global _dedup_flusher
+    if _dedup_flusher is None:
+        _dedup_flusher = asyncio.create_task(_run_dedup_flusher())
+
+def stop_dedup_flusher() -> None:
+    """플러시 태스크 중지 후 남은 집계를 모두 기록"""
+    global _dedup_flusher
+    if _dedup_flusher is not None:
+        _dedup_flusher.cancel()
+        _dedup_flusher = None
+    flush_suppressed_errors(flush_all=True)
 
 async def _log_and_track_error(
     request: Request, 
@@ -120,9 +221,12 @@ async def _log_and_track_error(
     """에러 로깅 및 추적"""
     
     # 요청 정보 추출
-    request_info = await _extract_request_info(request)
+    request_info = _extract_request_info(request)
     
-    # 구조화된 로깅
+    # 동일 (에러 코드, 경로) 반복 여부 - 반복된 에러는 로컬 로그만 남기고 Sentry 전송 생략
+    duplicate = _is_duplicate_error(error.error_code, request_info["path"])
+    
+    # 구조화된 로깅 (traceback은 exc_info로 넘겨 실제로 출력될 때만 포맷팅)
     error_logger.error(
         msg=f"API Error: {error.error_code} - {error.detail}",
         exc_info=original_exception or error,
@@ -132,15 +236,23 @@ async def _log_and_track_error(
             "status_code": error.status_code,
             "severity": severity,
             "request_info": request_info,
-            "traceback": traceback.format_exc() if original_exception else None,
             "user_id": request_info.get("user_id"),
-            "request_id": request_info.get("request_id")
+            "request_id": request_info.get("request_id"),
+            "duplicate": duplicate
         }
     )
     
+    if duplicate:
+        return
+    
+    # Sentry 전송 샘플링 (로컬 로그는 항상 남기고, 낮은 심각도는 일부만 전송)
+    if random.random() >= _SEVERITY_SAMPLE_RATE.get(severity, 1.0):
+        return
+    
     # Sentry 에러 추적 (심각도에 따라)
-    if severity in [ErrorSeverity.HIGH, ErrorSeverity.CRITICAL]:
-        error_tracker.capture_exception(
+    if severity in _HIGH_OR_CRITICAL:
+        enqueue_capture(
+            "capture_exception",
             error=original_exception or error,
             context={
                 "error_id": error.error_id,
@@ -154,7 +266,8 @@ async def _log_and_track_error(
             }
         )
     elif severity == ErrorSeverity.MEDIUM:
-        error_tracker.capture_message(
+        enqueue_capture(
+            "capture_message",
             message=f"API Error: {error.error_code} - {error.detail}",
             level="warning",
             context={
@@ -164,60 +277,66 @@ async def _log_and_track_error(
             user_id=request_info.get("user_id")
         )
 
-async def _extract_request_info(request: Request) -> dict:
+# 로그/Sentry에 남길 헤더 (전체 헤더 복사 대신 고정된 필드만 기록)
+_LOGGED_HEADERS = ("content-type", "content-length", "user-agent", "referer", "x-request-id")
+
+def _extract_request_info(request: Request) -> dict:
     """요청 정보 추출"""
+    headers = request.headers
     
     # 헤더에서 사용자 정보 추출 (인증 미들웨어에서 설정)
-    user_id = request.headers.get("X-User-ID")
-    request_id = request.headers.get("X-Request-ID")
+    user_id = headers.get("X-User-ID")
+    request_id = headers.get("X-Request-ID")
     
-    # 클라이언트 IP 추출
-    client_ip = request.client.host if request.client else "unknown"
-    forwarded_for = request.headers.get("X-Forwarded-For")
+    # 클라이언트 IP 추출 (X-Forwarded-For는 첫 번째 홉만 필요하므로 split 대신 find)
+    forwarded_for = headers.get("X-Forwarded-For")
     if forwarded_for:
-        client_ip = forwarded_for.split(",")[0].strip()
+        idx = forwarded_for.find(",")
+        client_ip = (forwarded_for[:idx] if idx != -1 else forwarded_for).strip()
+    else:
+        client = request.client
+        client_ip = client.host if client else "unknown"
     
-    return {
+    request_info = {
         "method": request.method,
         "url": str(request.url),
         "path": request.url.path,
-        "query_params": dict(request.query_params),
-        "headers": dict(request.headers),
+        "headers": {k: headers[k] for k in _LOGGED_HEADERS if k in headers},
         "client_ip": client_ip,
-        "user_agent": request.headers.get("User-Agent", "unknown"),
+        "user_agent": headers.get("User-Agent", "unknown"),
         "user_id": user_id,
         "request_id": request_id,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": time.time()
     }
-
-def _convert_http_exception_to_api_error(exc: HTTPException) -> APIError:
-    """HTTPException을 APIError로 변환"""
     
-    # 상태 코드에 따른 에러 코드 매핑
-    status_code_mapping = {
-        400: ErrorCode.VALIDATION_ERROR,
-        401: ErrorCode.UNAUTHORIZED,
-        403: ErrorCode.FORBIDDEN,
-        404: ErrorCode.NOT_FOUND,
-        429: ErrorCode.RATE_LIMIT_EXCEEDED,
-        500: ErrorCode.INTERNAL_SERVER_ERROR,
-    }
-    
-    error_code = status_code_mapping.get(exc.status_code, ErrorCode.INTERNAL_SERVER_ERROR)
-    
-    # 심각도 결정
-    if exc.status_code >= 500:
-        severity = ErrorSeverity.HIGH
-    elif exc.status_code >= 400:
-        severity = ErrorSeverity.MEDIUM
-    else:
-        severity = ErrorSeverity.LOW
+    # 쿼리 파라미터는 디버그 환경에서만 기록
+    if _DEBUG:
+        request_info["query_params"] = dict(request.query_params)
     
+    return request_info
+
+# 상태 코드에 따른 에러 코드 매핑
+_HTTP_STATUS_TO_ERROR_CODE: Dict[int, ErrorCode] = {
+    400: ErrorCode.VALIDATION_ERROR,
+    401: ErrorCode.UNAUTHORIZED,
+    403: ErrorCode.FORBIDDEN,
+    404: ErrorCode.NOT_FOUND,
+    429: ErrorCode.RATE_LIMIT_EXCEEDED,
+    500: ErrorCode.INTERNAL_SERVER_ERROR,
+}
+
+def _convert_http_exception_to_api_error(exc: StarletteHTTPException) -> APIError:
+    """HTTPException을 APIError로 변환"""
+    status_code = exc.status_code
     return APIError(
-        error_code=error_code,
+        error_code=_HTTP_STATUS_TO_ERROR_CODE.get(status_code, ErrorCode.INTERNAL_SERVER_ERROR),
         detail=str(exc.detail),
-        status_code=exc.status_code,
-        severity=severity
+        status_code=status_code,
+        severity=(
+            ErrorSeverity.HIGH if status_code >= 500
+            else ErrorSeverity.MEDIUM if status_code >= 400
+            else ErrorSeverity.LOW
+        )
     )
 
 # 에러 응답 모니터링을 위한 미들웨어
@@ -226,36 +345,34 @@ class ErrorMonitoringMiddleware:
     
     def __init__(self, app):
         self.app = app
+        # Sentry가 꺼져 있으면 브레드크럼을 쌓을 곳이 없으므로 래퍼 자체를 생략
+        self._enabled = SENTRY_ENABLED
+        self._add_breadcrumb = error_tracker.add_breadcrumb
     
     async def __call__(self, scope, receive, send):
-        if scope["type"] != "http":
+        if scope["type"] != "http" or not self._enabled:
             await self.app(scope, receive, send)
             return
         
-        # 응답 모니터링을 위한 래퍼
-        response_started = False
-        status_code = 200
+        add_breadcrumb = self._add_breadcrumb
         
         async def send_wrapper(message):
-            nonlocal response_started, status_code
-            
-            if message["type"] == "http.response.start":
-                response_started = True
+            # 에러 응답 모니터링 (2xx/3xx는 추가 할당 없이 통과, 4xx는 샘플링)
+            if message["type"] == "http.response.start" and message["status"] >= 400 and (
+                message["status"] >= 500 or random.random() < _CLIENT_ERROR_BREADCRUMB_RATE
+            ):
                 status_code = message["status"]
-                
-                # 에러 응답 모니터링
-                if status_code >= 400:
-                    error_tracker.add_breadcrumb(
-                        message=f"Error response: {status_code}",
-                        category="http_error",
-                        level="warning",
-                        data={
-                            "status_code": status_code,
-                            "path": scope["path"],
-                            "method": scope["method"]
-                        }
-                    )
+                add_breadcrumb(
+                    message=f"Error response: {status_code}",
+                    category="http_error",
+                    level="warning",
+                    data={
+                        "status_code": status_code,
+                        "path": scope["path"],
+                        "method": scope["method"]
+                    }
+                )
             
             await send(message)
         
-        await self.app(scope, receive, send_wrapper) 
\ No newline at end of file
+        await self.app(scope, receive, send_wrapper)
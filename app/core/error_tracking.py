@@ -4,20 +4,32 @@ from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 from sentry_sdk.integrations.logging import LoggingIntegration
 from app.core.config import settings
 from typing import Dict, Any, Optional
+import asyncio
+import logging
+import reprlib
 import traceback
 
+logger = logging.getLogger(__name__)
+
+# Sentry 사용 여부 (모듈 로드 시 한 번만 확인)
+SENTRY_ENABLED = bool(getattr(settings, 'SENTRY_DSN', None))
+
 def init_sentry():
     """Sentry 초기화"""
-    if hasattr(settings, 'SENTRY_DSN') and settings.SENTRY_DSN:
+    if SENTRY_ENABLED:
+        integrations = [
+            FastApiIntegration(auto_enabling_integrations=False),
+            LoggingIntegration(level=None, event_level=None),
+        ]
+        # 쿼리마다 span을 만드는 SQLAlchemy 트레이싱은 디버그 환경에서만 사용
+        if settings.DEBUG:
+            integrations.append(SqlalchemyIntegration())
+        
         sentry_sdk.init(
             dsn=settings.SENTRY_DSN,
-            integrations=[
-                FastApiIntegration(auto_enabling_integrations=False),
-                SqlalchemyIntegration(),
-                LoggingIntegration(level=None, event_level=None),
-            ],
-            traces_sample_rate=0.1,  # 10% 트레이싱
-            profiles_sample_rate=0.1,  # 10% 프로파일링
+            integrations=integrations,
+            traces_sample_rate=0.01,  # 1% 트레이싱
+            profiles_sample_rate=0.01,  # 1% 프로파일링 (에러 이벤트는 샘플링하지 않음)
             environment=settings.ENVIRONMENT,
             release=getattr(settings, 'VERSION', '1.0.0'),
         )
@@ -89,81 +101,121 @@ class ErrorTracker:
 # 전역 에러 추적기
 error_tracker = ErrorTracker()
 
+# --- 비동기 Sentry 전송 큐 ---
+# 요청 처리 경로에서는 큐에 넣기만 하고, scope 생성/이벤트 직렬화는 백그라운드 작업에서 수행
+
+CAPTURE_QUEUE_SIZE = 1000
+_capture_queue: Optional[asyncio.Queue] = None
+_capture_worker: Optional[asyncio.Task] = None
+dropped_capture_events = 0
+
+def enqueue_capture(method: str, **kwargs) -> None:
+    """
+    error_tracker.capture_exception / capture_message 호출을 큐에 적재
+    워커가 실행 중이 아니면 즉시 호출, 큐가 가득 차면 버림 (이미 Sentry 측 rate limit 구간)
+    """
+    global dropped_capture_events
+    if not SENTRY_ENABLED:
+        return
+    if _capture_queue is None:
+        getattr(error_tracker, method)(**kwargs)
+        return
+    try:
+        _capture_queue.put_nowait((method, kwargs))
+    except asyncio.QueueFull:
+        dropped_capture_events += 1
+
+async def _drain_capture_queue() -> None:
+    while True:
+        method, kwargs = await _capture_queue.get()
+        try:
+            getattr(error_tracker, method)(**kwargs)
+        except Exception:
+            logger.exception("Sentry capture failed")
+        finally:
+            _capture_queue.task_done()
+
+def start_capture_worker() -> None:
+    """Sentry 전송 워커 시작 (애플리케이션 startup 이벤트에서 호출)"""
+    global _capture_queue, _capture_worker
+    if not SENTRY_ENABLED or _capture_worker is not None:
+        return
+    _capture_queue = asyncio.Queue(maxsize=CAPTURE_QUEUE_SIZE)
+    _capture_worker = asyncio.create_task(_drain_capture_queue())
+
+def stop_capture_worker() -> None:
+    """Sentry 전송 워커 중지 (큐에 남은 이벤트는 버리지 않고 바로 전송)"""
+    global _capture_queue, _capture_worker
+    queue = _capture_queue
+    if _capture_worker is not None:
+        _capture_worker.cancel()
+    _capture_queue = None
+    _capture_worker = None
+    if queue is None:
+        return
+    # 종료 직전에 쌓인 이벤트(대개 종료 원인이 된 예외)까지 전송
+    while not queue.empty():
+        method, kwargs = queue.get_nowait()
+        try:
+            getattr(error_tracker, method)(**kwargs)
+        except Exception:
+            logger.exception("Sentry capture failed")
+
+# 캡처 컨텍스트에 남길 인자 표현 (큰 객체가 이벤트 크기를 키우지 않도록 길이 제한)
+_arg_repr = reprlib.Repr()
+_arg_repr.maxstring = 200
+_arg_repr.maxother = 200
+_arg_repr.maxlist = 5
+_arg_repr.maxtuple = 5
+_arg_repr.maxdict = 5
+
+# 값 대신 이름만 기록할 무거운 인자
+_OMITTED_KWARGS = frozenset({"file", "request", "db"})
+
 # 데코레이터
 def track_errors(operation_name: str = None):
-    """에러 추적 데코레이터"""
+    """
+    에러 추적 데코레이터
+    호출마다 시작/종료 브레드크럼을 남기지 않고, 실패 시에만 예외를 캡처한다.
+    Sentry가 설정되지 않은 경우 원래 함수를 그대로 반환한다.
+    """
     def decorator(func):
+        if not SENTRY_ENABLED:
+            return func
+        
         from functools import wraps
+        operation = operation_name or f"{func.__module__}.{func.__name__}"
         
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            operation = operation_name or f"{func.__module__}.{func.__name__}"
-            
-            try:
-                # 브레드크럼 추가
-                error_tracker.add_breadcrumb(
-                    f"Starting {operation}",
-                    category="function_call",
-                    data={"operation": operation}
-                )
-                
-                result = await func(*args, **kwargs)
-                
-                error_tracker.add_breadcrumb(
-                    f"Completed {operation}",
-                    category="function_call",
-                    data={"operation": operation, "success": True}
-                )
-                
-                return result
-                
-            except Exception as e:
-                error_tracker.capture_exception(
-                    e,
-                    context={
-                        "operation": operation,
-                        "args": str(args),
-                        "kwargs": str(kwargs)
-                    }
-                )
-                raise
+        def capture(e: Exception, args, kwargs):
+            error_tracker.capture_exception(
+                e,
+                context={
+                    "operation": operation,
+                    "args": _arg_repr.repr(args),
+                    "kwargs": _arg_repr.repr({
+                        k: ("<omitted>" if k in _OMITTED_KWARGS else v)
+                        for k, v in kwargs.items()
+                    })
+                }
+            )
+        
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    capture(e, args, kwargs)
+                    raise
+            return async_wrapper
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            operation = operation_name or f"{func.__module__}.{func.__name__}"
-            
             try:
-                error_tracker.add_breadcrumb(
-                    f"Starting {operation}",
-                    category="function_call",
-                    data={"operation": operation}
-                )
-                
-                result = func(*args, **kwargs)
-                
-                error_tracker.add_breadcrumb(
-                    f"Completed {operation}",
-                    category="function_call",
-                    data={"operation": operation, "success": True}
-                )
-                
-                return result
-                
+                return func(*args, **kwargs)
             except Exception as e:
-                error_tracker.capture_exception(
-                    e,
-                    context={
-                        "operation": operation,
-                        "args": str(args),
-                        "kwargs": str(kwargs)
-                    }
-                )
+                capture(e, args, kwargs)
                 raise
-        
-        import asyncio
-        if asyncio.iscoroutinefunction(func):
-            return async_wrapper
-        else:
-            return sync_wrapper
+        return sync_wrapper
     
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -1,8 +1,13 @@
 from typing import Dict, Any, Optional, List
 from fastapi import HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+import orjson
 from datetime import datetime
-import uuid
+from functools import cached_property
+import itertools
+import os
+import secrets
+import time
 from enum import Enum
 
 class ErrorCode(str, Enum):
@@ -62,9 +67,68 @@ class ErrorSeverity(str, Enum):
     HIGH = "HIGH"
     CRITICAL = "CRITICAL"
 
+# 에러 ID: 프로세스별 랜덤 prefix + 증가 카운터 (에러마다 uuid4/urandom 호출 불필요)
+_error_id_prefix = secrets.token_hex(4)
+_error_id_seq = itertools.count(1)
+
+def _reset_error_id_prefix() -> None:
+    # fork된 워커끼리 ID가 겹치지 않도록 자식 프로세스에서 prefix 재생성
+    global _error_id_prefix, _error_id_seq
+    _error_id_prefix = secrets.token_hex(4)
+    _error_id_seq = itertools.count(1)
+
+os.register_at_fork(after_in_child=_reset_error_id_prefix)
+
+def _next_error_id() -> str:
+    return f"{_error_id_prefix}-{next(_error_id_seq):x}"
+
+# 사용자 친화적 에러 메시지 (에러 생성 시마다 dict를 새로 만들지 않도록 모듈 상수로 유지)
+_USER_FRIENDLY_MESSAGES: Dict[ErrorCode, str] = {
+    ErrorCode.INTERNAL_SERVER_ERROR: "일시적인 서버 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+    ErrorCode.VALIDATION_ERROR: "입력 정보에 오류가 있습니다. 다시 확인해주세요.",
+    ErrorCode.UNAUTHORIZED: "로그인이 필요합니다.",
+    ErrorCode.FORBIDDEN: "접근 권한이 없습니다.",
+    ErrorCode.NOT_FOUND: "요청한 정보를 찾을 수 없습니다.",
+    
+    ErrorCode.INVALID_MODEL: "지원하지 않는 AI 모델입니다.",
+    ErrorCode.MODEL_NOT_AVAILABLE: "현재 사용할 수 없는 모델입니다.",
+    
+    ErrorCode.USAGE_LIMIT_EXCEEDED: "사용 한도를 초과했습니다. 요금제를 확인해주세요.",
+    ErrorCode.SUBSCRIPTION_REQUIRED: "구독이 필요한 서비스입니다.",
+    ErrorCode.QUOTA_EXCEEDED: "월간 사용량을 초과했습니다.",
+    
+    ErrorCode.FILE_TOO_LARGE: "파일 크기가 너무 큽니다. (최대 32MB)",
+    ErrorCode.INVALID_FILE_TYPE: "지원하지 않는 파일 형식입니다.",
+    ErrorCode.FILE_UPLOAD_FAILED: "파일 업로드에 실패했습니다.",
+    
+    ErrorCode.INVALID_INPUT: "입력 형식이 올바르지 않습니다.",
+    ErrorCode.MISSING_REQUIRED_FIELD: "필수 정보가 누락되었습니다.",
+    ErrorCode.INVALID_FORMAT: "올바른 형식으로 입력해주세요.",
+    
+    ErrorCode.RATE_LIMIT_EXCEEDED: "요청이 너무 빠릅니다. 잠시 후 다시 시도해주세요.",
+    
+    ErrorCode.AI_SERVICE_UNAVAILABLE: "AI 서비스가 일시적으로 사용할 수 없습니다.",
+    ErrorCode.AI_SERVICE_ERROR: "AI 서비스 처리 중 오류가 발생했습니다.",
+    ErrorCode.TOKEN_CALCULATION_FAILED: "토큰 계산에 실패했습니다.",
+    
+    ErrorCode.DATABASE_ERROR: "데이터베이스 오류가 발생했습니다.",
+    ErrorCode.RECORD_NOT_FOUND: "요청한 데이터를 찾을 수 없습니다.",
+    ErrorCode.DUPLICATE_RECORD: "이미 존재하는 데이터입니다.",
+    
+    ErrorCode.PROJECT_NOT_FOUND: "프로젝트를 찾을 수 없습니다.",
+    ErrorCode.PROJECT_ACCESS_DENIED: "프로젝트에 대한 접근 권한이 없습니다.",
+    
+    ErrorCode.INVALID_SESSION: "세션이 유효하지 않습니다.",
+    ErrorCode.SESSION_EXPIRED: "세션이 만료되었습니다. 다시 로그인해주세요.",
+}
+
 class APIError(HTTPException):
     """표준화된 API 에러"""
     
+    # 예외 객체는 BaseException이 __dict__를 가지므로 메모리 절감보다는 속성 접근을 슬롯으로 처리하는 용도
+    # (error_id는 cached_property라 __dict__에 저장됨)
+    __slots__ = ("error_code", "user_message", "details", "severity", "_created_at")
+    
     def __init__(
         self,
         error_code: ErrorCode,
@@ -79,54 +143,29 @@ class APIError(HTTPException):
         self.user_message = user_message or self._get_user_friendly_message(error_code)
         self.details = details or {}
         self.severity = severity
-        self.error_id = str(uuid.uuid4())
-        self.timestamp = datetime.utcnow().isoformat()
+        # ISO 문자열 변환은 응답 직렬화 시점으로 미룸
+        self._created_at = time.time()
+    
+    @cached_property
+    def error_id(self) -> str:
+        """로그 상관관계용 에러 ID (실제로 읽힐 때만 생성)"""
+        return _next_error_id()
     
-    def _get_user_friendly_message(self, error_code: ErrorCode) -> str:
+    @property
+    def timestamp(self) -> str:
+        """에러 발생 시각 (UTC, ISO 8601)"""
+        return datetime.utcfromtimestamp(self._created_at).isoformat()
+    
+    @staticmethod
+    def _get_user_friendly_message(error_code: ErrorCode) -> str:
         """사용자 친화적 에러 메시지"""
-        messages = {
-            ErrorCode.INTERNAL_SERVER_ERROR: "일시적인 서버 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
-            ErrorCode.VALIDATION_ERROR: "입력 정보에 오류가 있습니다. 다시 확인해주세요.",
-            ErrorCode.UNAUTHORIZED: "로그인이 필요합니다.",
-            ErrorCode.FORBIDDEN: "접근 권한이 없습니다.",
-            ErrorCode.NOT_FOUND: "요청한 정보를 찾을 수 없습니다.",
-            
-            ErrorCode.INVALID_MODEL: "지원하지 않는 AI 모델입니다.",
-            ErrorCode.MODEL_NOT_AVAILABLE: "현재 사용할 수 없는 모델입니다.",
-            
-            ErrorCode.USAGE_LIMIT_EXCEEDED: "사용 한도를 초과했습니다. 요금제를 확인해주세요.",
-            ErrorCode.SUBSCRIPTION_REQUIRED: "구독이 필요한 서비스입니다.",
-            ErrorCode.QUOTA_EXCEEDED: "월간 사용량을 초과했습니다.",
-            
-            ErrorCode.FILE_TOO_LARGE: "파일 크기가 너무 큽니다. (최대 32MB)",
-            ErrorCode.INVALID_FILE_TYPE: "지원하지 않는 파일 형식입니다.",
-            ErrorCode.FILE_UPLOAD_FAILED: "파일 업로드에 실패했습니다.",
-            
-            ErrorCode.INVALID_INPUT: "입력 형식이 올바르지 않습니다.",
-            ErrorCode.MISSING_REQUIRED_FIELD: "필수 정보가 누락되었습니다.",
-            ErrorCode.INVALID_FORMAT: "올바른 형식으로 입력해주세요.",
-            
-            ErrorCode.RATE_LIMIT_EXCEEDED: "요청이 너무 빠릅니다. 잠시 후 다시 시도해주세요.",
-            
-            ErrorCode.AI_SERVICE_UNAVAILABLE: "AI 서비스가 일시적으로 사용할 수 없습니다.",
-            ErrorCode.AI_SERVICE_ERROR: "AI 서비스 처리 중 오류가 발생했습니다.",
-            ErrorCode.TOKEN_CALCULATION_FAILED: "토큰 계산에 실패했습니다.",
-            
-            ErrorCode.DATABASE_ERROR: "데이터베이스 오류가 발생했습니다.",
-            ErrorCode.RECORD_NOT_FOUND: "요청한 데이터를 찾을 수 없습니다.",
-            ErrorCode.DUPLICATE_RECORD: "이미 존재하는 데이터입니다.",
-            
-            ErrorCode.PROJECT_NOT_FOUND: "프로젝트를 찾을 수 없습니다.",
-            ErrorCode.PROJECT_ACCESS_DENIED: "프로젝트에 대한 접근 권한이 없습니다.",
-            
-            ErrorCode.INVALID_SESSION: "세션이 유효하지 않습니다.",
-            ErrorCode.SESSION_EXPIRED: "세션이 만료되었습니다. 다시 로그인해주세요.",
-        }
-        return messages.get(error_code, "알 수 없는 오류가 발생했습니다.")
+        return _USER_FRIENDLY_MESSAGES.get(error_code, "알 수 없는 오류가 발생했습니다.")
 
 class ValidationError(APIError):
     """입력 검증 에러"""
     
+    __slots__ = ()
+    
     def __init__(self, detail: str, field_errors: Optional[List[Dict[str, str]]] = None):
         super().__init__(
             error_code=ErrorCode.VALIDATION_ERROR,
@@ -139,6 +178,8 @@ class ValidationError(APIError):
 class AuthenticationError(APIError):
     """인증 에러"""
     
+    __slots__ = ()
+    
     def __init__(self, detail: str = "Authentication required"):
         super().__init__(
             error_code=ErrorCode.UNAUTHORIZED,
@@ -150,6 +191,8 @@ class AuthenticationError(APIError):
 class AuthorizationError(APIError):
     """인가 에러"""
     
+    __slots__ = ()
+    
     def __init__(self, detail: str = "Access denied"):
         super().__init__(
             error_code=ErrorCode.FORBIDDEN,
@@ -161,6 +204,8 @@ class AuthorizationError(APIError):
 class NotFoundError(APIError):
     """리소스 찾기 실패 에러"""
     
+    __slots__ = ()
+    
     def __init__(self, resource: str, identifier: Optional[str] = None):
         detail = f"{resource} not found"
         if identifier:
@@ -175,6 +220,8 @@ class NotFoundError(APIError):
 class RateLimitError(APIError):
     """레이트 리미팅 에러"""
     
+    __slots__ = ()
+    
     def __init__(self, detail: str = "Rate limit exceeded", retry_after: Optional[int] = None):
         details = {}
         if retry_after:
@@ -190,6 +237,8 @@ class RateLimitError(APIError):
 class AIServiceError(APIError):
     """AI 서비스 에러"""
     
+    __slots__ = ()
+    
     def __init__(self, detail: str, model: Optional[str] = None, operation: Optional[str] = None):
         details = {}
         if model:
@@ -207,6 +256,8 @@ class AIServiceError(APIError):
 class UsageLimitError(APIError):
     """사용량 제한 에러"""
     
+    __slots__ = ()
+    
     def __init__(self, detail: str, current_usage: Optional[int] = None, limit: Optional[int] = None):
         details = {}
         if current_usage is not None:
@@ -224,6 +275,8 @@ class UsageLimitError(APIError):
 class FileError(APIError):
     """파일 관련 에러"""
     
+    __slots__ = ()
+    
     def __init__(self, detail: str, filename: Optional[str] = None, error_code: ErrorCode = ErrorCode.FILE_UPLOAD_FAILED):
         details = {}
         if filename:
@@ -236,11 +289,10 @@ class FileError(APIError):
             severity=ErrorSeverity.LOW
         )
 
-def create_error_response(error: APIError) -> JSONResponse:
-    """표준화된 에러 응답 생성"""
-    return JSONResponse(
-        status_code=error.status_code,
-        content={
+def create_error_response(error: APIError) -> Response:
+    """표준화된 에러 응답 생성 (orjson으로 한 번에 직렬화)"""
+    content = orjson.dumps(
+        {
             "error": {
                 "code": error.error_code,
                 "message": error.user_message,
@@ -249,5 +301,11 @@ def create_error_response(error: APIError) -> JSONResponse:
                 "timestamp": error.timestamp,
                 "severity": error.severity
             }
-        }
-    ) 
\ No newline at end of file
+        },
+        default=str,
+    )
+    return Response(
+        content=content,
+        status_code=error.status_code,
+        media_type="application/json"
+    )
@@ -1,17 +1,22 @@
 """
 헬스 모니터링 시스템 - 온디맨드 방식 (성능 최적화)
 """
+import orjson
 import psutil
 import os
 import logging
+import time
 from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, Any, List
-from threading import Thread, Event
+from functools import lru_cache
+from typing import Dict, Any, Tuple
+from threading import Thread, Event, Lock, current_thread, get_ident, local
 
 logger = logging.getLogger("health_monitor")
 
+_HAS_NUM_FDS = hasattr(psutil.Process, "num_fds")
+
 class HealthStatus(str, Enum):
     """헬스 상태"""
     HEALTHY = "healthy"
@@ -19,11 +24,18 @@ class HealthStatus(str, Enum):
     CRITICAL = "critical"
     UNHEALTHY = "unhealthy"
 
-@dataclass
+@dataclass(frozen=True)
 class HealthMetrics:
-    """헬스 메트릭"""
+    """헬스 메트릭 (이력에 다수 보관되므로 __dict__ 없이 슬롯 사용)"""
+    # Python 3.9 런타임이라 dataclass(slots=True) 대신 직접 선언 (필드 기본값이 없어 충돌 없음)
+    __slots__ = (
+        "cpu_percent", "memory_percent", "memory_rss", "disk_usage_percent", "open_files",
+        "connections", "threads", "uptime_seconds", "response_time_avg", "error_rate", "timestamp",
+    )
+    
     cpu_percent: float
     memory_percent: float
+    memory_rss: int
     disk_usage_percent: float
     open_files: int
     connections: int
@@ -49,22 +61,65 @@ class HealthMonitor:
         self.response_time_threshold = response_time_threshold
         self.error_rate_threshold = error_rate_threshold
         
+        # 평가 규칙 테이블 (메트릭, 위험 임계값, 경고 임계값, 위험 메시지, 경고 메시지)
+        # 경고 구간 임계값은 평가 때마다 곱하지 않도록 미리 계산
+        self._health_rules = (
+            # 디스크 사용률 체크 (가장 중요)
+            ("disk_usage_percent", disk_threshold, disk_threshold * 0.9,
+             "High disk usage: %.1f%%", "Elevated disk usage: %.1f%%"),
+            # 메모리 사용률 체크
+            ("memory_percent", memory_threshold, memory_threshold * 0.8,
+             "High memory usage: %.1f%%", "Elevated memory usage: %.1f%%"),
+            # CPU 사용률 체크 (덜 중요 - 경고만)
+            ("cpu_percent", float("inf"), cpu_threshold,
+             None, "High CPU usage: %.1f%%"),
+        )
+        
         self.start_time = datetime.now()
+        self._start_mono = time.monotonic()
         
-        # 요청 통계 (간소화)
-        self.request_count = 0
-        self.error_count = 0
-        self.total_response_time = 0.0
-        self.last_reset_time = datetime.now()
+        # 요청 통계 (스레드별 누적 후 조회 시 합산 - 요청 경로에서 공유 변수/락 경합 없음)
+        # 각 슬롯: [request_count, total_response_time, error_count, generation]
+        self._local_stats = local()
+        # 스레드 ident -> (스레드, 슬롯). 종료된 스레드의 슬롯은 합산 시 _retired_stats로 옮기고 제거
+        self._thread_stats: Dict[int, Tuple[Thread, list]] = {}
+        self._retired_stats = [0, 0.0, 0, 0]
+        self._thread_stats_lock = Lock()
+        self._stats_generation = 0
+        self._last_reset_mono = time.monotonic()
         
         # 최근 메트릭 (캐시용 - 5분간 유효)
         self.cached_metrics = None
-        self.cache_timestamp = None
+        self.cached_status = None  # cached_metrics에 대한 평가 결과
+        self._cached_body: Dict[str, Any] = {}
+        self._cached_json_prefix = b""
+        self.cache_timestamp = None  # time.monotonic() 기준
         self.cache_duration = 300  # 5분
         
+        # 연결 수 조회는 /proc/net/* 전체를 읽어 비싸므로 N회 수집마다 한 번만 갱신
+        self._connections_sample_interval = 10
+        self._collect_tick = 0
+        self._last_connections = 0
+        
+        # 디스크 사용률은 분 단위로 변하므로 별도 TTL로 캐시 (monotonic ts, percent)
+        self._disk_cache_ttl = 60
+        self._disk_cache = (0.0, 0.0)
+        
+        # PID는 바뀌지 않으므로 Process 핸들을 한 번만 생성해 재사용
+        self._proc = psutil.Process(os.getpid())
+        # 전체 물리 메모리는 변하지 않으므로 한 번만 조회 (memory_percent()는 매번 /proc/meminfo를 읽음)
+        self._total_memory = psutil.virtual_memory().total
+        
     def start(self):
         """헬스 모니터링 시작 (온디맨드 방식이므로 백그라운드 스레드 없음)"""
         self.start_time = datetime.now()
+        self._start_mono = time.monotonic()
+        # cpu_percent(interval=None)는 직전 호출 대비 변화량을 반환하므로
+        # 첫 조회가 0.0이 되지 않도록 기준점을 미리 잡아 둠 (블로킹 없음)
+        try:
+            self._proc.cpu_percent(interval=None)
+        except psutil.Error:
+            pass
         logger.info("Health monitor started (on-demand mode)")
     
     def stop(self):
@@ -74,37 +129,51 @@ class HealthMonitor:
     def _collect_metrics_lightweight(self) -> HealthMetrics:
         """가벼운 헬스 메트릭 수집 (필수 항목만)"""
         try:
-            process = psutil.Process(os.getpid())
-            
-            # CPU 사용률 (즉시 반환, interval=0으로 빠른 체크)
-            cpu_percent = process.cpu_percent(interval=0)
+            process = self._proc
             
-            # 메모리 사용률
-            memory_percent = process.memory_percent()
+            # 프로세스 단위 조회는 oneshot으로 묶어 /proc 파일을 한 번만 읽음
+            with process.oneshot():
+                # CPU 사용률 (즉시 반환, 직전 조회 이후 구간의 평균)
+                cpu_percent = process.cpu_percent(interval=None)
+                
+                # 메모리 사용률
+                memory_rss = process.memory_info().rss
+                memory_percent = memory_rss / self._total_memory * 100
+                
+                # 간단한 프로세스 정보
+                # num_fds()는 fd 개수만 세므로 open_files()처럼 각 fd를 stat/readlink 하지 않음 (POSIX 전용)
+                open_files = process.num_fds() if _HAS_NUM_FDS else len(process.open_files())
+                if self._collect_tick % self._connections_sample_interval == 0:
+                    self._last_connections = len(process.connections(kind='inet'))
+                connections = self._last_connections
+                self._collect_tick += 1
+                threads = process.num_threads()
             
-            # 디스크 사용률 (루트 파티션만)
-            disk_usage = psutil.disk_usage('/')
-            disk_usage_percent = disk_usage.percent
-            
-            # 간단한 프로세스 정보
-            open_files = len(process.open_files())
-            connections = len(process.connections())
-            threads = process.num_threads()
+            # 디스크 사용률 (루트 파티션만, 시스템 전역 값이라 oneshot 밖에서 조회)
+            now_mono = time.monotonic()
+            if self._disk_cache[0] and now_mono - self._disk_cache[0] < self._disk_cache_ttl:
+                disk_usage_percent = self._disk_cache[1]
+            else:
+                disk_usage_percent = psutil.disk_usage('/').percent
+                self._disk_cache = (now_mono, disk_usage_percent)
             
             # 업타임
-            uptime_seconds = (datetime.now() - self.start_time).total_seconds()
+            uptime_seconds = time.monotonic() - self._start_mono
+            
+            request_count, total_response_time, error_count = self._aggregate_request_stats()
             
             # 응답시간 평균
-            response_time_avg = (self.total_response_time / self.request_count 
-                               if self.request_count > 0 else 0.0)
+            response_time_avg = (total_response_time / request_count 
+                               if request_count > 0 else 0.0)
             
             # 에러율
-            error_rate = (self.error_count / self.request_count 
-                         if self.request_count > 0 else 0.0)
+            error_rate = (error_count / request_count 
+                         if request_count > 0 else 0.0)
             
             return HealthMetrics(
                 cpu_percent=cpu_percent,
                 memory_percent=memory_percent,
+                memory_rss=memory_rss,
                 disk_usage_percent=disk_usage_percent,
                 open_files=open_files,
                 connections=connections,
@@ -115,93 +184,146 @@ class HealthMonitor:
                 timestamp=datetime.now()
             )
             
+        except psutil.NoSuchProcess:
+            # 핸들이 무효화된 경우 다음 수집을 위해 재생성
+            self._proc = psutil.Process(os.getpid())
+            return self._default_metrics()
         except Exception as e:
-            logger.error(f"Error collecting metrics: {e}")
-            # 에러 시 기본값 반환
-            return HealthMetrics(
-                cpu_percent=0.0,
-                memory_percent=0.0,
-                disk_usage_percent=0.0,
-                open_files=0,
-                connections=0,
-                threads=1,
-                uptime_seconds=(datetime.now() - self.start_time).total_seconds(),
-                response_time_avg=0.0,
-                error_rate=0.0,
-                timestamp=datetime.now()
-            )
+            logger.error("Error collecting metrics: %s", e)
+            return self._default_metrics()
+    
+    def _default_metrics(self) -> HealthMetrics:
+        """수집 실패 시 기본 메트릭"""
+        return HealthMetrics(
+            cpu_percent=0.0,
+            memory_percent=0.0,
+            memory_rss=0,
+            disk_usage_percent=0.0,
+            open_files=0,
+            connections=0,
+            threads=1,
+            uptime_seconds=time.monotonic() - self._start_mono,
+            response_time_avg=0.0,
+            error_rate=0.0,
+            timestamp=datetime.now()
+        )
     
     def _evaluate_health(self, metrics: HealthMetrics) -> HealthStatus:
         """헬스 상태 평가 (간소화)"""
-        critical_issues = []
-        warning_issues = []
-        
-        # 디스크 사용률 체크 (가장 중요)
-        if metrics.disk_usage_percent > self.disk_threshold:
-            critical_issues.append(f"High disk usage: {metrics.disk_usage_percent:.1f}%")
-        elif metrics.disk_usage_percent > self.disk_threshold * 0.9:
-            warning_issues.append(f"Elevated disk usage: {metrics.disk_usage_percent:.1f}%")
+        critical = False
+        warning = False
+        issues = []  # (형식, 값) - 로그가 실제로 출력될 때만 문자열로 만듦
         
-        # 메모리 사용률 체크
-        if metrics.memory_percent > self.memory_threshold:
-            critical_issues.append(f"High memory usage: {metrics.memory_percent:.1f}%")
-        elif metrics.memory_percent > self.memory_threshold * 0.8:
-            warning_issues.append(f"Elevated memory usage: {metrics.memory_percent:.1f}%")
+        for attr, critical_threshold, warning_threshold, critical_fmt, warning_fmt in self._health_rules:
+            value = getattr(metrics, attr)
+            if value > critical_threshold:
+                critical = True
+                issues.append((critical_fmt, value))
+            elif value > warning_threshold:
+                warning = True
+                issues.append((warning_fmt, value))
         
-        # CPU 사용률 체크 (덜 중요)
-        if metrics.cpu_percent > self.cpu_threshold:
-            warning_issues.append(f"High CPU usage: {metrics.cpu_percent:.1f}%")
+        if issues and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Health issues: %s", ", ".join(fmt % value for fmt, value in issues))
         
         # 상태 결정
-        if critical_issues:
+        if critical:
             return HealthStatus.CRITICAL
-        elif warning_issues:
+        elif warning:
             return HealthStatus.WARNING
         else:
             return HealthStatus.HEALTHY
     
+    def _get_thread_stats(self) -> list:
+        """현재 스레드의 요청 통계 슬롯 반환 (최초 호출 시 등록)"""
+        stats = getattr(self._local_stats, "stats", None)
+        if stats is None:
+            stats = [0, 0.0, 0, self._stats_generation]
+            self._local_stats.stats = stats
+            ident = get_ident()
+            with self._thread_stats_lock:
+                # 종료된 스레드의 ident가 재사용된 경우 이전 슬롯을 먼저 정리
+                previous = self._thread_stats.get(ident)
+                if previous is not None:
+                    self._retire_slot(previous[1])
+                self._thread_stats[ident] = (current_thread(), stats)
+        elif stats[3] != self._stats_generation:
+            # 리셋 이후 첫 기록이면 이 스레드의 누적값을 비움
+            stats[:] = [0, 0.0, 0, self._stats_generation]
+        return stats
+    
+    def _aggregate_request_stats(self) -> Tuple[int, float, int]:
+        """스레드별 요청 통계 합산 (request_count, total_response_time, error_count)"""
+        generation = self._stats_generation
+        with self._thread_stats_lock:
+            # 스레드풀이 스레드를 교체해도 슬롯이 쌓이지 않도록 종료된 스레드의 누적값은 합계에 접어 넣음
+            dead = [ident for ident, (thread, _) in self._thread_stats.items() if not thread.is_alive()]
+            for ident in dead:
+                self._retire_slot(self._thread_stats.pop(ident)[1])
+            slots = [stats for _, stats in self._thread_stats.values()]
+            slots.append(self._retired_stats)
+        request_count, total_response_time, error_count = 0, 0.0, 0
+        for stats in slots:
+            if stats[3] == generation:
+                request_count += stats[0]
+                total_response_time += stats[1]
+                error_count += stats[2]
+        return request_count, total_response_time, error_count
+    
+    def _retire_slot(self, stats: list) -> None:
+        """종료된 스레드의 슬롯을 _retired_stats에 합산 (_thread_stats_lock 보유 상태에서 호출)"""
+        generation = self._stats_generation
+        retired = self._retired_stats
+        if retired[3] != generation:
+            retired[:] = [0, 0.0, 0, generation]
+        if stats[3] == generation:
+            retired[0] += stats[0]
+            retired[1] += stats[1]
+            retired[2] += stats[2]
+    
     def record_request(self, response_time: float, is_error: bool = False):
-        """요청 기록 (간소화)"""
-        self.request_count += 1
-        self.total_response_time += response_time
+        """요청 기록 (스레드 로컬 누적)"""
+        stats = self._get_thread_stats()
+        # 비율이 1을 넘지 않도록 분모(요청 수)를 먼저 증가
+        stats[0] += 1
+        stats[1] += response_time
         
         if is_error:
-            self.error_count += 1
+            stats[2] += 1
         
         # 1시간마다 통계 리셋
-        if (datetime.now() - self.last_reset_time).total_seconds() > 3600:
+        if time.monotonic() - self._last_reset_mono > 3600:
             self.reset_request_stats()
     
     def reset_request_stats(self):
-        """요청 통계 리셋"""
-        self.request_count = 0
-        self.error_count = 0
-        self.total_response_time = 0.0
-        self.last_reset_time = datetime.now()
+        """요청 통계 리셋 (세대 번호를 올려 기존 스레드별 누적값을 무효화)"""
+        self._stats_generation += 1
+        self._last_reset_mono = time.monotonic()
     
-    def get_health_status(self) -> Dict[str, Any]:
-        """현재 헬스 상태 반환 (캐시 사용)"""
-        now = datetime.now()
+    def _refresh_if_stale(self) -> float:
+        """캐시가 만료되었으면 메트릭을 새로 수집하고 현재 monotonic 시각 반환"""
+        now = time.monotonic()
         
         # 캐시가 유효한지 확인 (5분 이내)
-        if (self.cached_metrics and self.cache_timestamp and 
-            (now - self.cache_timestamp).total_seconds() < self.cache_duration):
-            metrics = self.cached_metrics
-        else:
-            # 새로운 메트릭 수집
-            metrics = self._collect_metrics_lightweight()
-            self.cached_metrics = metrics
-            self.cache_timestamp = now
+        if (self.cached_metrics and self.cache_timestamp is not None and 
+            now - self.cache_timestamp < self.cache_duration):
+            return now
         
+        # 새로운 메트릭 수집
+        metrics = self._collect_metrics_lightweight()
         status = self._evaluate_health(metrics)
+        self.cached_metrics = metrics
+        self.cached_status = status
+        self.cache_timestamp = now
         
-        return {
+        # 캐시 기간 동안 변하지 않는 응답 본문과 그 JSON 바이트를 갱신 시점에 한 번만 생성
+        self._cached_body = {
             "status": status.value,
             "timestamp": metrics.timestamp.isoformat(),
             "metrics": {
                 "cpu_percent": metrics.cpu_percent,
                 "memory_percent": metrics.memory_percent,
-                "memory_rss": metrics.memory_percent * 10,  # 근사치
+                "memory_rss": metrics.memory_rss,
                 "disk_usage_percent": metrics.disk_usage_percent,
                 "open_files": metrics.open_files,
                 "connections": metrics.connections,
@@ -209,24 +331,48 @@ class HealthMonitor:
                 "uptime_seconds": metrics.uptime_seconds,
                 "response_time_avg": metrics.response_time_avg,
                 "error_rate": metrics.error_rate
-            },
+            }
+        }
+        # 호출마다 달라지는 cache_age_seconds만 뒤에 이어 붙일 수 있도록 닫는 괄호 앞까지 보관
+        self._cached_json_prefix = (
+            orjson.dumps(self._cached_body)[:-1]
+            + b',"cache_info":{"cached":true,"cache_age_seconds":'
+        )
+        return now
+    
+    def get_health_status(self) -> Dict[str, Any]:
+        """현재 헬스 상태 반환 (캐시 사용)"""
+        now = self._refresh_if_stale()
+        return {
+            **self._cached_body,
             "cache_info": {
-                "cached": self.cached_metrics is not None,
-                "cache_age_seconds": (now - self.cache_timestamp).total_seconds() if self.cache_timestamp else 0
+                "cached": True,
+                "cache_age_seconds": now - self.cache_timestamp
             }
         }
     
+    def get_health_status_bytes(self) -> bytes:
+        """현재 헬스 상태를 JSON 바이트로 반환 (캐시 적중 시 미리 인코딩된 본문 재사용)"""
+        now = self._refresh_if_stale()
+        return self._cached_json_prefix + orjson.dumps(now - self.cache_timestamp) + b"}}"
+    
     def get_current_metrics(self) -> Dict[str, Any]:
         """현재 메트릭 반환"""
         return self.get_health_status()
 
-# 전역 헬스 모니터 (온디맨드 방식)
-health_monitor = HealthMonitor()
+@lru_cache(maxsize=1)
+def get_health_monitor() -> HealthMonitor:
+    """전역 헬스 모니터 (온디맨드 방식 - 첫 사용 시점에 생성)"""
+    return HealthMonitor()
 
 def get_health_status() -> Dict[str, Any]:
     """헬스 상태 반환"""
-    return health_monitor.get_health_status()
+    return get_health_monitor().get_health_status()
+
+def get_health_status_bytes() -> bytes:
+    """헬스 상태 JSON 바이트 반환"""
+    return get_health_monitor().get_health_status_bytes()
 
 def record_request_metrics(response_time: float, is_error: bool = False):
     """요청 메트릭 기록"""
-    health_monitor.record_request(response_time, is_error) 
\ No newline at end of file
+    get_health_monitor().record_request(response_time, is_error)
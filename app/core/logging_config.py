@@ -6,78 +6,260 @@
 - 외부 라이브러리 로깅 레벨 제어
 - 오래된 로그 파일 자동 정리
 """
+import atexit
+import copy
 import logging
 import logging.handlers
 import os
-import json
-import traceback
-from datetime import datetime
-from typing import Optional, Dict, Any
+import queue
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Set
+
+import orjson
 
 from app.core.config import settings
 
 # --- JSON Formatter ---
 
+# LogRecord가 기본으로 가지는 속성 (이 외의 속성은 extra로 전달된 값)
+_STANDARD_RECORD_KEYS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys()
+) | {"message", "asctime"}
+
 class JsonFormatter(logging.Formatter):
     """로그 레코드를 JSON 형식으로 변환하는 포맷터"""
+    # 레코드 생성 시각(record.created)을 UTC ISO 형식으로 출력
+    # (큐를 거쳐 나중에 포맷되더라도 기록 시점이 유지되고, 포맷마다 datetime 객체를 만들지 않음)
+    converter = time.gmtime
+    default_time_format = "%Y-%m-%dT%H:%M:%S"
+    default_msec_format = "%s.%03d"
+
     def format(self, record: logging.LogRecord) -> str:
         log_object = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self.formatTime(record),
             "level": record.levelname,
             "name": record.name,
             "message": record.getMessage(),
         }
         if record.exc_info:
             log_object['exc_info'] = self.formatException(record.exc_info)
-            log_object['traceback'] = traceback.format_exc()
+        elif record.exc_text:
+            # 큐를 거친 레코드는 exc_info 대신 미리 포맷된 exc_text를 가짐 (_StructuredQueueHandler 참고)
+            log_object['exc_info'] = record.exc_text
         
-        # extra 필드의 내용을 로그 객체에 추가
-        if hasattr(record, '__dict__'):
-            for key, value in record.__dict__.items():
-                if key not in log_object and key not in ['args', 'asctime', 'created', 'exc_info', 'exc_text', 'filename', 'funcName', 'levelname', 'levelno', 'lineno', 'module', 'msecs', 'message', 'msg', 'name', 'pathname', 'process', 'processName', 'relativeCreated', 'stack_info', 'thread', 'threadName']:
-                    log_object[key] = value
+        # extra 필드의 내용을 로그 객체에 추가 (표준 속성과의 차집합 - extra가 없으면 빈 집합)
+        record_dict = record.__dict__
+        extras = record_dict.keys() - _STANDARD_RECORD_KEYS
+        for key in extras:
+            if key not in log_object:
+                log_object[key] = record_dict[key]
             
-        return json.dumps(log_object, ensure_ascii=False)
+        # orjson은 UTF-8 그대로, 공백 없이 직렬화 (stdlib json 대비 수 배 빠름)
+        return orjson.dumps(log_object, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+# --- 버퍼링 파일 핸들러 ---
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    레코드마다 flush하지 않고 큰 버퍼에 모아 쓰는 RotatingFileHandler.
+    WARNING 이상 레코드는 즉시, 나머지는 flush_interval마다 디스크로 내보낸다.
+    (새 레코드가 없어도 백그라운드 스레드가 주기적으로 flush하고,
+     close/로깅 종료 시에는 스트림이 닫히면서 남은 버퍼가 모두 기록됨)
+    """
+    flush_interval = 1.0
+
+    def __init__(self, *args, buffer_size: int = 64 * 1024, **kwargs):
+        self._buffer_size = buffer_size
+        self._last_flush = time.monotonic()
+        self._force_flush = False
+        self._dirty = False  # 마지막 flush 이후 버퍼에 쓴 레코드가 있는지
+        self._stream_size = 0
+        self._pending_size = 0
+        super().__init__(*args, **kwargs)
+        self._flusher_stop = threading.Event()
+        threading.Thread(target=self._flush_periodically, name="log-file-flush", daemon=True).start()
+
+    def _open(self):
+        stream = open(self.baseFilename, self.mode, buffering=self._buffer_size,
+                      encoding=self.encoding, errors=self.errors)
+        self._stream_size = stream.seek(0, 2)
+        return stream
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        # 기본 구현은 레코드마다 seek/tell(= 버퍼 flush)을 하므로 기록한 크기를 직접 누적해 비교
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes <= 0:
+            return False
+        # maxBytes는 바이트 기준이므로 문자 수가 아닌 인코딩된 길이로 누적 (한글은 UTF-8에서 글자당 3바이트)
+        msg = self.format(record) + self.terminator
+        self._pending_size = len(msg.encode(self.encoding or 'utf-8', self.errors or 'strict'))
+        return self._stream_size + self._pending_size >= self.maxBytes
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._force_flush = record.levelno >= logging.WARNING
+        self._pending_size = 0
+        self._dirty = True
+        super().emit(record)
+        self._stream_size += self._pending_size
+
+    def flush(self) -> None:
+        now = time.monotonic()
+        if self._force_flush or now - self._last_flush >= self.flush_interval:
+            self._flush_now(now)
+
+    def _flush_now(self, now: float) -> None:
+        super().flush()
+        self._last_flush = now
+        self._dirty = False
+
+    def _flush_periodically(self) -> None:
+        # 조용한 서버에서도 INFO 레코드가 버퍼에 남아 있다가 강제 종료 시 유실되지 않도록 주기적으로 내보냄
+        while not self._flusher_stop.wait(self.flush_interval):
+            if not self._dirty:
+                continue
+            with self.lock:
+                if self._dirty and self.stream is not None:
+                    self._flush_now(time.monotonic())
+
+    def close(self) -> None:
+        self._flusher_stop.set()
+        super().close()
+
+# --- 큐 기반 비동기 로거 ---
+
+# 모든 로거의 레코드는 루트의 QueueHandler 하나로 모이고, 단일 리스너 스레드가 실제 핸들러(콘솔/파일)에 기록.
+# 호출 스레드는 queue.put_nowait만 수행하므로 파일/콘솔 I/O나 핸들러 락을 기다리지 않는다.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    기본 QueueHandler.prepare는 트레이스백을 메시지 뒤에 붙이고 exc_info/exc_text를 비우므로,
+    메시지는 그대로 두고 트레이스백만 exc_text로 분리해 넘긴다 (JSON의 exc_info 필드로 출력).
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # 트레이스백 객체는 다른 스레드로 넘기지 않고 이 시점에 문자열로 변환
+            if not record.exc_text:
+                record.exc_text = _get_formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _start_queue_listener(handlers: List[logging.Handler]) -> None:
+    """리스너 스레드를 (재)시작하고 실제 출력 핸들러를 연결"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+    # 출력 핸들러는 레벨을 두지 않고(NOTSET) 로거 레벨에서만 걸러내므로 리스너에서 핸들러 레벨을 다시 비교하지 않음
+    _queue_listener = logging.handlers.QueueListener(_log_queue, *handlers, respect_handler_level=False)
+    _queue_listener.start()
+
+def _stop_queue_listeners() -> None:
+    """종료 시 큐에 남은 레코드를 모두 기록"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+atexit.register(_stop_queue_listeners)
 
 # --- 로깅 설정 함수 ---
 
+_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+@lru_cache(maxsize=1)
+def _get_formatter() -> logging.Formatter:
+    """핸들러들이 공유하는 JSON 포맷터 (재설정 시에도 같은 인스턴스 사용)"""
+    return JsonFormatter()
+
+_created_log_dirs: Set[str] = set()
+
+def _ensure_dir(path: str) -> None:
+    """로그 디렉토리 생성 (프로세스 내에서 이미 확인한 경로는 다시 조회하지 않음)"""
+    if path in _created_log_dirs:
+        return
+    os.makedirs(path, exist_ok=True)
+    _created_log_dirs.add(path)
+
+_logging_initialized = False
+
+def _bootstrap_root(level: int) -> logging.Logger:
+    """루트 로거 레벨 설정 및 기존 핸들러 제거"""
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    
+    # 기존 핸들러 제거
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    return root_logger
+
 def setup_logging(
     log_level: str = settings.LOG_LEVEL,
     log_file: Optional[str] = settings.LOG_FILE,
     max_file_size: int = 10 * 1024 * 1024,  # 10MB
     backup_count: int = 5,
-    enable_file_logging: bool = True
+    enable_file_logging: bool = True,
+    force: bool = False
 ):
-    """애플리케이션 전역 로깅을 설정합니다."""
-    level = getattr(logging, log_level.upper(), logging.INFO)
-    formatter = JsonFormatter()
-    
-    root_logger = logging.getLogger()
-    root_logger.setLevel(level)
+    """
+    애플리케이션 전역 로깅을 설정합니다.
+    프로세스당 한 번만 수행하며, 다시 구성하려면 force=True로 호출합니다.
+    """
+    global _logging_initialized
+    if _logging_initialized and not force:
+        return
+    _logging_initialized = True
     
-    # 기존 핸들러 제거
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
+    formatter = _get_formatter()
+    root_logger = _bootstrap_root(_LEVELS.get(log_level.upper(), logging.INFO))
     
-    # 콘솔 핸들러 추가
+    # 콘솔 핸들러 (리스너 스레드에서 기록)
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    output_handlers: List[logging.Handler] = [console_handler]
     
     # 파일 핸들러 추가 (프로덕션 환경 기본)
     if enable_file_logging and log_file:
+        if settings.WORKERS > 1 and not settings.LOG_EXTERNAL_ROTATION:
+            # 워커마다 전용 파일에 기록 - 같은 파일을 여러 프로세스가 각자 순환하며 경쟁하지 않음
+            # (app.log -> app.<pid>.log, 정리 함수의 '.log' 패턴에 그대로 포함됨)
+            base, ext = os.path.splitext(log_file)
+            log_file = f"{base}.{os.getpid()}{ext or '.log'}"
         log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
+        if log_dir:
+            _ensure_dir(log_dir)
             
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_file,
-            maxBytes=max_file_size,
-            backupCount=backup_count,
-            encoding='utf-8'
-        )
+        if settings.LOG_EXTERNAL_ROTATION:
+            # 파일이 외부에서 교체/축소되면 다시 열기만 하고 rename은 하지 않음 (멀티 프로세스 안전)
+            file_handler = logging.handlers.WatchedFileHandler(log_file, encoding='utf-8')
+        else:
+            file_handler = BufferedRotatingFileHandler(
+                log_file,
+                maxBytes=max_file_size,
+                backupCount=backup_count,
+                encoding='utf-8'
+            )
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        output_handlers.append(file_handler)
+
+    # 루트에는 QueueHandler만 연결 - 파일 쓰기(+ 순환/재오픈)와 콘솔 출력은 리스너 스레드에서 수행
+    # (error_handler 등 하위 로거는 전파를 통해 같은 큐를 사용)
+    root_logger.addHandler(_StructuredQueueHandler(_log_queue))
+    _start_queue_listener(output_handlers)
 
     # 주요 외부 라이브러리 로깅 레벨 조정
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -91,36 +273,46 @@ def setup_logging(
 
 # --- 로그 정리 함수 ---
 
+# 현재 로그(app.log)와 순환된 로그(app.log.1 ...)를 한 번의 정규식 검색으로 판별
+_is_log_name = re.compile(r"\.log(?:$|\.)").search
+
 def cleanup_old_logs(log_directory: str, max_age_days: int = 7):
     """지정된 기간보다 오래된 로그 파일을 정리합니다."""
-    if not os.path.exists(log_directory):
+    cutoff_time = time.time() - (max_age_days * 24 * 3600)
+    # scandir 한 번으로 목록과 파일 종류를 얻고, stat은 항목당 한 번만 수행
+    try:
+        entries = os.scandir(log_directory)
+    except FileNotFoundError:
         return
-    
-    cutoff_time = datetime.now().timestamp() - (max_age_days * 24 * 3600)
-    for filename in os.listdir(log_directory):
-        if filename.endswith('.log') or '.log.' in filename:
-            filepath = os.path.join(log_directory, filename)
-            try:
-                if os.path.getmtime(filepath) < cutoff_time:
-                    os.remove(filepath)
-                    logging.info(f"Removed old log file: {filepath}")
-            except OSError as e:
-                logging.error(f"Error removing log file {filepath}: {e}")
+    with entries:
+        for entry in entries:
+            if _is_log_name(entry.name):
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                        os.remove(entry.path)
+                        logging.info(f"Removed old log file: {entry.path}")
+                except OSError as e:
+                    logging.error(f"Error removing log file {entry.path}: {e}")
 
 def get_log_files_info(log_directory: str) -> Dict[str, Any]:
     """로그 파일들의 총 크기와 개수를 반환합니다."""
     total_size = 0
     file_count = 0
-    if os.path.exists(log_directory):
-        for filename in os.listdir(log_directory):
-            if filename.endswith('.log') or '.log.' in filename:
-                filepath = os.path.join(log_directory, filename)
+    try:
+        entries = os.scandir(log_directory)
+    except FileNotFoundError:
+        return {"file_count": 0, "total_size_mb": 0.0}
+    with entries:
+        for entry in entries:
+            if _is_log_name(entry.name):
                 try:
-                    if os.path.isfile(filepath):
-                        total_size += os.path.getsize(filepath)
+                    if entry.is_file():
+                        total_size += entry.stat().st_size
                         file_count += 1
                 except OSError as e:
-                    logging.error(f"Error getting size of log file {filepath}: {e}")
+                    logging.error(f"Error getting size of log file {entry.path}: {e}")
     return {
         "file_count": file_count,
         "total_size_mb": total_size / (1024 * 1024)
@@ -129,4 +321,5 @@ def get_log_files_info(log_directory: str) -> Dict[str, Any]:
 # --- 애플리케이션 시작 시 로깅 초기화 ---
 # main.py에서 이 함수를 호출하여 로깅을 설정합니다.
 def init_logging():
+    """로깅 초기화 (이미 설정된 경우 핸들러/리스너 스레드를 다시 만들지 않음)"""
     setup_logging()
\ No newline at end of file
@@ -2,18 +2,32 @@
 메모리 관리 및 자동 정리 시스템
 """
 import gc
-import psutil
 import os
+import psutil
 import asyncio
 import logging
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
-from threading import Thread, Event
-import threading
+from typing import Optional, Dict, Any, List, Tuple
 import time
 
 logger = logging.getLogger("memory_manager")
 
+_HAS_NUM_FDS = hasattr(psutil.Process, "num_fds")
+
+# Linux에서는 /proc/<pid>/statm, /proc/meminfo를 직접 읽어 psutil 호출을 줄임
+_HAS_PROC_FS = os.path.exists("/proc/meminfo")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if _HAS_PROC_FS else 4096
+
+def _meminfo_bytes(meminfo: bytes, field: bytes) -> int:
+    """/proc/meminfo 내용에서 'Field:   1234 kB' 값을 바이트로 반환"""
+    start = meminfo.index(field) + len(field)
+    end = meminfo.index(b"\n", start)
+    return int(meminfo[start:end].split()[0]) * 1024
+
+# 위급 시 캐시 정리 범위 (전체 키스페이스를 막는 FLUSHDB/KEYS 대신 제한된 SCAN)
+CACHE_IDLE_SECONDS = 3600      # 이 시간 이상 접근되지 않은 키만 제거
+CACHE_SCAN_BATCH = 500         # SCAN COUNT 및 IDLETIME 파이프라인 크기
+CACHE_SCAN_LIMIT = 10000       # 한 번의 정리에서 검사할 최대 키 수
+
 class MemoryManager:
     """메모리 관리자"""
     
@@ -25,164 +39,270 @@ class MemoryManager:
         self.check_interval = check_interval
         self.cleanup_interval = cleanup_interval
         self.is_running = False
-        self.stop_event = Event()
-        self.monitor_thread = None
-        self.cleanup_thread = None
+        # 모니터링/정리를 스레드 두 개 대신 앱 이벤트 루프의 태스크 하나로 수행
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._last_cleanup = 0.0  # time.monotonic() 기준
+        # 정리 단계별 결과를 모아 두었다가 정리 1회당 로그 레코드 하나로 기록
+        self._event_buf: List[Dict[str, Any]] = []
+        # PID는 바뀌지 않으므로 Process 핸들을 한 번만 생성해 재사용
+        self._proc = psutil.Process()
+        # /proc 파일 디스크립터 (열어 둔 프로세스의 pid, (statm fd, meminfo fd))
+        self._proc_fds_pid: Optional[int] = None
+        self._proc_fds: Optional[Tuple[int, int]] = None
         
     def start(self):
-        """메모리 관리자 시작"""
+        """메모리 관리자 시작 (앱 이벤트 루프 안에서 호출)"""
+        # 이전 태스크가 아직 종료 중이면 중복 생성하지 않음
+        if self.is_running or (self._task is not None and not self._task.done()):
+            return
+        self.is_running = True
+        self._stop_event = asyncio.Event()
+        self._last_cleanup = time.monotonic()
+        # cpu_percent(interval=None)의 기준점 설정 (첫 조회가 0.0이 되지 않도록)
+        self._proc.cpu_percent(interval=None)
+        self._task = asyncio.get_running_loop().create_task(self._run(self._stop_event))
+        
+        logger.info("Memory manager started")
+    
+    async def stop(self, timeout: float = 5.0):
+        """
+        메모리 관리자 중지 (대기 중인 루프를 즉시 깨워 종료)
+        진행 중인 정리는 timeout까지 기다리고, 그래도 끝나지 않으면 태스크를 취소한다.
+        태스크가 끝날 때까지 참조를 유지하므로 그 사이 start()가 호출돼도 루프가 중복 생성되지 않음
+        """
         if not self.is_running:
-            self.is_running = True
-            self.stop_event.clear()
+            return
+        self.is_running = False
+        
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._stop_event = None
+        
+        task = self._task
+        if task is not None and not task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+            except asyncio.TimeoutError:
+                task.cancel()
+            except Exception as e:
+                logger.error(f"Memory manager task failed during stop: {e}")
+        if self._task is task:
+            self._task = None
             
-            # 메모리 모니터링 스레드 시작
-            self.monitor_thread = Thread(target=self._monitor_memory)
-            self.monitor_thread.daemon = True
-            self.monitor_thread.start()
+        logger.info("Memory manager stopped")
+    
+    async def _run(self, stop_event: asyncio.Event):
+        """메모리 모니터링 + 정기 정리 루프"""
+        while not stop_event.is_set():
+            try:
+                # 다음 체크 시각까지 대기하되 stop()이 호출되면 바로 깨어남
+                await asyncio.wait_for(stop_event.wait(), timeout=self.check_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
             
-            # 정리 스레드 시작
-            self.cleanup_thread = Thread(target=self._cleanup_loop)
-            self.cleanup_thread.daemon = True
-            self.cleanup_thread.start()
+            # psutil 조회/gc/Redis 호출은 동기 작업이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+            await asyncio.to_thread(self._monitor_memory)
             
-            logger.info("Memory manager started")
-    
-    def stop(self):
-        """메모리 관리자 중지"""
-        if self.is_running:
-            self.is_running = False
-            self.stop_event.set()
+            if stop_event.is_set():
+                return
             
-            if self.monitor_thread:
-                self.monitor_thread.join(timeout=5)
-            if self.cleanup_thread:
-                self.cleanup_thread.join(timeout=5)
-                
-            logger.info("Memory manager stopped")
+            if time.monotonic() - self._last_cleanup >= self.cleanup_interval:
+                self._last_cleanup = time.monotonic()
+                try:
+                    await asyncio.to_thread(self._routine_cleanup)
+                except Exception as e:
+                    logger.error(f"Error in cleanup loop: {e}")
     
     def _monitor_memory(self):
         """메모리 모니터링"""
-        while self.is_running and not self.stop_event.wait(self.check_interval):
-            try:
-                memory_info = self.get_memory_info()
-                
-                if memory_info['memory_percent'] > self.memory_threshold:
-                    logger.warning(f"High memory usage detected: {memory_info['memory_percent']:.1f}%")
-                    self._emergency_cleanup()
-                    
-                # 메모리 정보 로깅
-                logger.info(f"Memory status: {memory_info}")
+        try:
+            memory_info = self.get_memory_info()
+            
+            if memory_info['memory_percent'] > self.memory_threshold:
+                logger.warning(f"High memory usage detected: {memory_info['memory_percent']:.1f}%")
+                self._emergency_cleanup(memory_info['memory_percent'])
                 
-            except Exception as e:
-                logger.error(f"Error monitoring memory: {e}")
-    
-    def _cleanup_loop(self):
-        """정기적 정리 루프"""
-        while self.is_running and not self.stop_event.wait(self.cleanup_interval):
-            try:
-                self._routine_cleanup()
-            except Exception as e:
-                logger.error(f"Error in cleanup loop: {e}")
+            # 메모리 정보 로깅 (INFO가 꺼져 있으면 레코드를 만들지 않고, 켜져 있으면 구조화 필드로 기록)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Memory status", extra={"memory": memory_info})
+            
+        except Exception as e:
+            logger.error(f"Error monitoring memory: {e}")
     
-    def _emergency_cleanup(self):
+    def _emergency_cleanup(self, memory_percent: float):
         """긴급 메모리 정리"""
-        logger.info("Starting emergency memory cleanup")
-        
-        # 1. 가비지 컬렉션 강제 실행
-        collected = gc.collect()
-        logger.info(f"Garbage collection freed {collected} objects")
+        critical = memory_percent > self.memory_threshold + 10
         
-        # 2. 캐시 정리
-        self._cleanup_cache()
+        # 1. 가비지 컬렉션 - 0세대는 한 번만 수집하고, 호출 측에서 측정한 사용률이 위급 수준일 때만 전체 수집
+        # (전체 수집은 추적 중인 모든 객체를 순회하며 GIL을 오래 잡음)
+        collected = gc.collect(0)
+        if critical:
+            collected += gc.collect()
+        self._event_buf.append({"phase": "gc", "collected": collected})
         
-        # 3. 배치 처리 큐 정리
-        self._cleanup_batch_queue()
+        # 2. 캐시 정리 (임계값을 크게 넘긴 경우에만)
+        self._cleanup_cache(critical=critical)
         
-        # 4. 메모리 상태 재확인
+        # 3. 메모리 상태 재확인
         memory_info = self.get_memory_info()
-        logger.info(f"Memory after cleanup: {memory_info['memory_percent']:.1f}%")
+        self._event_buf.append({"phase": "after", "memory_percent": round(memory_info['memory_percent'], 1)})
+        
+        self._flush_events("emergency")
     
     def _routine_cleanup(self):
         """정기적 정리"""
-        logger.info("Starting routine memory cleanup")
-        
         # 1. 가비지 컬렉션
-        gc.collect()
-        
-        # 2. 캐시 정리
-        self._cleanup_cache()
+        self._event_buf.append({"phase": "gc", "collected": gc.collect(0)})
         
-        # 3. 오래된 배치 작업 정리
-        self._cleanup_old_tasks()
+        # 2. 캐시 만료는 Redis TTL/eviction 정책에 맡김
         
-        logger.info("Routine cleanup completed")
+        self._flush_events("routine")
+    
+    def _flush_events(self, kind: str):
+        """모아 둔 정리 결과를 하나의 레코드로 기록 (JsonFormatter가 extra 필드를 그대로 직렬화)"""
+        # 큐 리스너가 나중에 포맷하므로 기록한 리스트는 더 이상 수정하지 않고 새 버퍼로 교체
+        events, self._event_buf = self._event_buf, []
+        logger.info(f"Memory cleanup summary ({kind})", extra={"cleanup": kind, "events": events})
     
-    def _cleanup_cache(self):
-        """캐시 정리"""
+    def _cleanup_cache(self, critical: bool = False):
+        """
+        캐시 정리
+        만료는 Redis TTL에 맡기고, 위급한 경우에만 오래 사용되지 않은 키를 제한된 범위에서 제거
+        (FLUSHDB는 세션/핫 키까지 모두 지워 캐시 미스 폭주를 일으키므로 사용하지 않음)
+        """
+        if not critical:
+            return
         try:
-            from app.core.cache import cache_manager
+            from app.core.cache import cache_manager, EVICTABLE_KEY_PREFIXES
             
-            # 만료된 캐시 정리
-            cache_manager.redis_client.flushdb()
-            logger.info("Cache cleanup completed")
+            redis_client = cache_manager.redis_client
+            if not redis_client:
+                return
             
-        except Exception as e:
-            logger.error(f"Cache cleanup failed: {e}")
-    
-    def _cleanup_batch_queue(self):
-        """배치 큐 정리"""
-        try:
-            # 배치 큐 정리 로직 (안전한 방식)
-            logger.info("Attempting to cleanup batch queue")
+            scanned = 0
+            removed = 0
+            # 캐시 데이터 키만 대상으로 함 (인덱스 SET을 지우면 살아 있는 항목을 무효화할 수 없게 됨)
+            for prefix in EVICTABLE_KEY_PREFIXES:
+                batch = []
+                for key in redis_client.scan_iter(match=f"{prefix}*", count=CACHE_SCAN_BATCH):
+                    batch.append(key)
+                    scanned += 1
+                    if len(batch) >= CACHE_SCAN_BATCH or scanned >= CACHE_SCAN_LIMIT:
+                        removed += self._unlink_idle_keys(redis_client, batch)
+                        batch = []
+                        if scanned >= CACHE_SCAN_LIMIT:
+                            break
+                if batch:
+                    removed += self._unlink_idle_keys(redis_client, batch)
+                if scanned >= CACHE_SCAN_LIMIT:
+                    break
             
-            # 가비지 컬렉션을 통한 메모리 정리
-            gc.collect()
+            self._event_buf.append({"phase": "cache", "removed": removed, "scanned": scanned})
             
         except Exception as e:
-            logger.error(f"Batch queue cleanup failed: {e}")
+            logger.error(f"Cache cleanup failed: {e}")
     
-    def _cleanup_old_tasks(self):
-        """오래된 작업 정리"""
-        try:
-            # 오래된 작업 정리 로직 (안전한 방식)
-            logger.info("Attempting to cleanup old tasks")
-            
-            # 가비지 컬렉션을 통한 메모리 정리
-            gc.collect()
-                
-        except Exception as e:
-            logger.error(f"Old tasks cleanup failed: {e}")
+    @staticmethod
+    def _unlink_idle_keys(redis_client, keys) -> int:
+        """IDLETIME을 파이프라인으로 조회해 오래된 키만 UNLINK (메모리 회수는 Redis 백그라운드에서)"""
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.object("idletime", key)
+        idle_keys = [
+            key for key, idle in zip(keys, pipe.execute(raise_on_error=False))
+            if isinstance(idle, int) and idle > CACHE_IDLE_SECONDS
+        ]
+        if idle_keys:
+            redis_client.unlink(*idle_keys)
+        return len(idle_keys)
     
-    def get_memory_info(self) -> Dict[str, Any]:
-        """메모리 정보 반환"""
-        process = psutil.Process(os.getpid())
-        memory_info = process.memory_info()
-        system_memory = psutil.virtual_memory()
+    def get_memory_info(self, detailed: bool = False) -> Dict[str, Any]:
+        """
+        메모리 정보 반환
+        open_files/connections는 /proc의 fd·소켓 테이블을 모두 읽으므로 detailed=True일 때만 포함
+        """
+        process = self._proc
+        proc_memory = self._read_proc_memory()
+        with process.oneshot():
+            if proc_memory is None:
+                memory_info = process.memory_info()
+            cpu_percent = process.cpu_percent(interval=None)
+            threads = process.num_threads()
+            # fd 개수는 /proc/<pid>/fd 목록만 세므로 소켓 테이블 파싱 없이 항상 수집 가능 (POSIX)
+            open_fds = process.num_fds() if _HAS_NUM_FDS else None
+        
+        if proc_memory is not None:
+            rss, vms, total, available = proc_memory
+        else:
+            system_memory = psutil.virtual_memory()
+            rss, vms = memory_info.rss, memory_info.vms
+            total, available = system_memory.total, system_memory.available
         
-        return {
-            'memory_rss': memory_info.rss / 1024 / 1024,  # MB
-            'memory_vms': memory_info.vms / 1024 / 1024,  # MB
-            'memory_percent': process.memory_percent(),
-            'system_memory_total': system_memory.total / 1024 / 1024 / 1024,  # GB
-            'system_memory_available': system_memory.available / 1024 / 1024 / 1024,  # GB
-            'system_memory_percent': system_memory.percent,
-            'cpu_percent': process.cpu_percent(),
-            'open_files': len(process.open_files()),
-            'connections': len(process.connections()),
-            'threads': process.num_threads()
+        info = {
+            'memory_rss': rss / 1024 / 1024,  # MB
+            'memory_vms': vms / 1024 / 1024,  # MB
+            # memory_percent()는 시스템 메모리를 다시 조회하므로 이미 얻은 값으로 계산
+            'memory_percent': rss / total * 100,
+            'system_memory_total': total / 1024 / 1024 / 1024,  # GB
+            'system_memory_available': available / 1024 / 1024 / 1024,  # GB
+            'system_memory_percent': (total - available) / total * 100,
+            'cpu_percent': cpu_percent,
+            'threads': threads
         }
+        if open_fds is not None:
+            info['open_fds'] = open_fds
+        if detailed:
+            info['open_files'] = len(process.open_files())
+            info['connections'] = len(process.connections(kind='inet'))
+        return info
+    
+    def _read_proc_memory(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        /proc에서 (rss, vms, 전체 메모리, 가용 메모리)를 바이트 단위로 직접 읽기
+        파일은 한 번만 열고 pread로 읽어 seek/재오픈이 없고 여러 스레드에서 동시에 호출해도 안전.
+        Linux가 아니거나 읽기에 실패하면 None (psutil로 대체)
+        """
+        if not _HAS_PROC_FS:
+            return None
+        pid = os.getpid()
+        if self._proc_fds_pid != pid:
+            # 최초 호출 또는 fork 이후에는 현재 프로세스 기준으로 다시 연다
+            self._proc_fds_pid = pid
+            try:
+                self._proc_fds = (
+                    os.open(f"/proc/{pid}/statm", os.O_RDONLY),
+                    os.open("/proc/meminfo", os.O_RDONLY),
+                )
+            except OSError:
+                self._proc_fds = None
+        if self._proc_fds is None:
+            return None
+        statm_fd, meminfo_fd = self._proc_fds
+        try:
+            size, resident = os.pread(statm_fd, 256, 0).split()[:2]
+            meminfo = os.pread(meminfo_fd, 4096, 0)
+            return (
+                int(resident) * _PAGE_SIZE,
+                int(size) * _PAGE_SIZE,
+                _meminfo_bytes(meminfo, b"MemTotal:"),
+                _meminfo_bytes(meminfo, b"MemAvailable:"),
+            )
+        except (OSError, ValueError):
+            return None
     
     def force_cleanup(self):
         """강제 정리 실행"""
         logger.info("Force cleanup requested")
-        self._emergency_cleanup()
+        self._emergency_cleanup(self.get_memory_info()['memory_percent'])
 
 # 전역 메모리 관리자
 memory_manager = MemoryManager()
 
 def get_memory_status() -> Dict[str, Any]:
     """메모리 상태 반환"""
-    return memory_manager.get_memory_info()
+    return memory_manager.get_memory_info(detailed=True)
 
 def force_memory_cleanup():
     """강제 메모리 정리"""
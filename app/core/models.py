@@ -4,7 +4,8 @@ AI 모델 설정 중앙 관리
 """
 
 from enum import Enum
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
 from dataclasses import dataclass
 
 # 모델 그룹 정의
@@ -17,9 +18,10 @@ class ModelGroup(str, Enum):
 class ModelProvider(str, Enum):
     GOOGLE = "google"
 
-@dataclass
+@dataclass(frozen=True)
 class ModelConfig:
-    """모델 설정 클래스"""
+    """모델 설정 클래스 (모든 요청이 공유하는 설정이므로 불변)"""
+    # Python 3.9 런타임이라 slots=True를 쓸 수 없고, 필드 기본값이 있어 __slots__ 직접 선언도 불가
     name: str
     display_name: str
     version: str
@@ -151,30 +153,50 @@ ACTIVE_MODELS = {
     )
 }
 
+# 조회용 인덱스 (요청마다 ACTIVE_MODELS 전체를 훑지 않도록 임포트 시 한 번만 구성)
+# 여러 요청에서 공유되므로 수정할 수 없는 튜플로 보관
+_MODELS_BY_GROUP: Dict[ModelGroup, Tuple[ModelConfig, ...]] = {
+    group: tuple(config for config in ACTIVE_MODELS.values() if config.group == group)
+    for group in ModelGroup
+}
+_MODELS_BY_PROVIDER: Dict[ModelProvider, Tuple[ModelConfig, ...]] = {
+    provider: tuple(config for config in ACTIVE_MODELS.values() if config.provider == provider)
+    for provider in ModelProvider
+}
+_MULTIMODAL_MODELS: Tuple[str, ...] = tuple(
+    name for name, config in ACTIVE_MODELS.items() if config.supports_multimodal
+)
+_CITATION_MODELS: Tuple[str, ...] = tuple(
+    name for name, config in ACTIVE_MODELS.items() if config.supports_citations
+)
+_REASONING_MODELS: Tuple[str, ...] = tuple(
+    name for name, config in ACTIVE_MODELS.items() if config.supports_reasoning
+)
+
 # 편의 함수들
 def get_model_config(model_name: str) -> Optional[ModelConfig]:
     """모델 이름으로 설정 가져오기"""
     return ACTIVE_MODELS.get(model_name)
 
-def get_models_by_group(group: ModelGroup) -> List[ModelConfig]:
+def get_models_by_group(group: ModelGroup) -> Tuple[ModelConfig, ...]:
     """그룹별 모델 리스트 가져오기"""
-    return [config for config in ACTIVE_MODELS.values() if config.group == group]
+    return _MODELS_BY_GROUP.get(group, ())
 
-def get_models_by_provider(provider: ModelProvider) -> List[ModelConfig]:
+def get_models_by_provider(provider: ModelProvider) -> Tuple[ModelConfig, ...]:
     """제공업체별 모델 리스트 가져오기"""
-    return [config for config in ACTIVE_MODELS.values() if config.provider == provider]
+    return _MODELS_BY_PROVIDER.get(provider, ())
 
-def get_multimodal_models() -> List[str]:
+def get_multimodal_models() -> Tuple[str, ...]:
     """멀티모달 지원 모델 리스트"""
-    return [name for name, config in ACTIVE_MODELS.items() if config.supports_multimodal]
+    return _MULTIMODAL_MODELS
 
-def get_citation_models() -> List[str]:
+def get_citation_models() -> Tuple[str, ...]:
     """출처 제공 모델 리스트"""
-    return [name for name, config in ACTIVE_MODELS.items() if config.supports_citations]
+    return _CITATION_MODELS
 
-def get_reasoning_models() -> List[str]:
+def get_reasoning_models() -> Tuple[str, ...]:
     """추론 지원 모델 리스트"""
-    return [name for name, config in ACTIVE_MODELS.items() if config.supports_reasoning]
+    return _REASONING_MODELS
 
 # 모델 그룹 매핑 (역호환성)
 MODEL_GROUP_MAPPING = {
@@ -211,11 +233,12 @@ PLAN_LIMITS = {
     }
 }
 
-# 가격 정보 매핑 (AdminPage 호환)
-MODEL_PRICING = {
-    model_name: {
-        "input": config.pricing_input,
-        "output": config.pricing_output
-    }
+# 가격 정보 매핑 (AdminPage 호환) - 모델별 (입력, 출력) 1M 토큰당 가격, 읽기 전용
+MODEL_PRICING: Mapping[str, Tuple[float, float]] = MappingProxyType({
+    model_name: (config.pricing_input, config.pricing_output)
     for model_name, config in ACTIVE_MODELS.items()
-} 
\ No newline at end of file
+})
+
+def get_pricing(model_name: str) -> Tuple[float, float]:
+    """모델의 (입력, 출력) 가격 조회 (미등록 모델은 0원)"""
+    return MODEL_PRICING.get(model_name, (0.0, 0.0))
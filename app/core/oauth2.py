@@ -3,25 +3,46 @@ import httpx
 from app.core.config import settings
 from app.schemas.auth import GoogleUser
 
+GOOGLE_USERINFO_URL = 'https://www.googleapis.com/oauth2/v3/userinfo'
+
+# 토큰 검증마다 TCP/TLS 핸드셰이크를 반복하지 않도록 keep-alive 연결을 재사용하는 공용 클라이언트
+_client: Optional[httpx.AsyncClient] = None
+
+def get_oauth_client() -> httpx.AsyncClient:
+    """OAuth 검증용 공용 HTTP 클라이언트 (첫 사용 시 생성)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=5.0,
+        )
+    return _client
+
+async def close_oauth_client() -> None:
+    """애플리케이션 종료 시 공용 클라이언트 정리"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 async def verify_google_token(token: str) -> Optional[GoogleUser]:
     try:
-        async with httpx.AsyncClient() as client:
-            # Google OAuth2 userinfo 엔드포인트로 요청
-            response = await client.get(
-                'https://www.googleapis.com/oauth2/v3/userinfo',
-                headers={'Authorization': f'Bearer {token}'}
-            )
-            
-            if response.status_code != 200:
-                return None
-                
-            userinfo = response.json()
+        # Google OAuth2 userinfo 엔드포인트로 요청
+        response = await get_oauth_client().get(
+            GOOGLE_USERINFO_URL,
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        
+        if response.status_code != 200:
+            return None
             
-            return GoogleUser(
-                email=userinfo['email'],
-                name=userinfo['name'],
-                picture=userinfo.get('picture'),
-                sub=userinfo['sub']
-            )
+        userinfo = response.json()
+        
+        return GoogleUser(
+            email=userinfo['email'],
+            name=userinfo['name'],
+            picture=userinfo.get('picture'),
+            sub=userinfo['sub']
+        )
     except Exception as e:
-        return None 
\ No newline at end of file
+        return None 
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool  # NullPool 대신 QueuePool 사용
 from app.core.config import settings
@@ -20,9 +20,29 @@ engine = create_engine(
         "keepalives_idle": 120,  # 2분으로 설정 (더 자주 체크)
         "keepalives_interval": 10,  # 10초마다 keepalive
         "keepalives_count": 5,  # 더 많은 재시도
-        "application_name": "sungblab_api"
+        "application_name": "sungblab_api",
+        "options": "-c statement_timeout=30000",  # 연결 생성 시 기본 쿼리 타임아웃(30초) 지정
     }
 )
+
+# 연결 생성 시 한 번만 적용되는 세션 설정 (statement_timeout은 connect_args options로 지정)
+_SESSION_SETTINGS_SQL = (
+    "SET idle_in_transaction_session_timeout = '60s'; "  # 트랜잭션 유휴 타임아웃
+    "SET tcp_keepalives_idle = 300; "  # TCP keepalive
+    "SET tcp_keepalives_interval = 30; "
+    "SET tcp_keepalives_count = 3"
+)
+
+@event.listens_for(engine, "connect")
+def _apply_session_settings(dbapi_connection, connection_record):
+    # autocommit 상태에서 실행해야 이후 풀 반환 시 롤백으로 설정이 되돌려지지 않음
+    dbapi_connection.autocommit = True
+    try:
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(_SESSION_SETTINGS_SQL)
+    finally:
+        dbapi_connection.autocommit = False
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -3,12 +3,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.api_v1.api import api_router
 from app.db.init_db import init_db
-from app.core.error_handlers import setup_error_handlers, ErrorMonitoringMiddleware
-from app.core.error_tracking import init_sentry
+from app.core.error_handlers import (
+    setup_error_handlers, ErrorMonitoringMiddleware, start_dedup_flusher, stop_dedup_flusher
+)
+from app.core.error_tracking import init_sentry, start_capture_worker, stop_capture_worker
 from app.core.logging_config import init_logging
+from app.core.oauth2 import close_oauth_client
 from app.core.scheduled_tasks import scheduled_tasks
-from app.core.health_monitor import health_monitor
+from app.core.health_monitor import get_health_monitor
 from app.core.memory_manager import memory_manager
+from app.core.cache import response_cache
+import gc
 import logging
 import pytz
 from datetime import datetime
@@ -143,6 +148,15 @@ async def startup_event():
     # 로깅 시스템 초기화
     init_logging()
     
+    # Sentry 전송 워커 시작 (Sentry 미설정 시 no-op)
+    start_capture_worker()
+    
+    # 반복 에러 생략 횟수 주기적 기록
+    start_dedup_flusher()
+    
+    # AI 응답 캐시 쓰기 워커 시작 (Redis 미연결 시 no-op)
+    response_cache.start_writer()
+    
     try:
         init_db()
         
@@ -169,21 +183,13 @@ async def startup_event():
         
         logger.info("데이터베이스 연결 풀 초기화 완료")
         
-        # 데이터베이스 최적화 적용
-        try:
-            from app.core.db_optimization import db_optimizer
-            db_optimizer.optimize_database_settings()
-            logger.info("✅ 데이터베이스 최적화 설정 완료")
-        except Exception as e:
-            logger.warning(f"⚠️  데이터베이스 최적화 실패: {e}")
-        
         # 메모리 관리자 시작 (선택적)
         if settings.ENABLE_MEMORY_MANAGER:
             memory_manager.start()
         
         # 헬스 모니터 시작 (선택적)
         if settings.ENABLE_HEALTH_MONITOR:
-            health_monitor.start()
+            get_health_monitor().start()
         
         # 스케줄링 태스크 시작 (선택적)
         if settings.ENABLE_SCHEDULED_TASKS:
@@ -191,6 +197,9 @@ async def startup_event():
             # 시작 시 로그 정리 실행
             scheduled_tasks.force_cleanup_logs()
         
+        # 시작 시점까지 만들어진 모듈/프레임워크 객체는 이후 GC 순회 대상에서 제외
+        gc.freeze()
+        
         logger.info("SungbLab API server started successfully (optimized mode)")
         
     except Exception as e:
@@ -200,10 +209,22 @@ async def startup_event():
 async def shutdown_event():
     """애플리케이션 종료 시 정리 작업"""
     
+    stop_dedup_flusher()
+    stop_capture_worker()
+    
+    # 대기 중인 응답 캐시 쓰기를 기록한 뒤 워커 종료
+    await response_cache.stop_writer()
+    
+    # OAuth 검증용 공용 HTTP 클라이언트 연결 정리
+    await close_oauth_client()
+    
+    # 메모리 관리자 중지 (선택적)
+    if settings.ENABLE_MEMORY_MANAGER:
+        await memory_manager.stop()
     
     # 헬스 모니터 중지 (선택적)
     if settings.ENABLE_HEALTH_MONITOR:
-        health_monitor.stop()
+        get_health_monitor().stop()
     
     # 스케줄링 태스크 중지 (선택적)
     if settings.ENABLE_SCHEDULED_TASKS:
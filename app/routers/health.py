@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from datetime import datetime
 from app.core.utils import KST
-from app.core.health_monitor import get_health_status, health_monitor
+from app.core.health_monitor import get_health_status_bytes, get_health_monitor
 
 router = APIRouter()
 
@@ -21,8 +21,8 @@ def detailed_health_check():
     
     시스템의 상세한 상태 정보를 반환합니다.
     """
-    health_status = get_health_status()
-    return health_status
+    # 캐시된 메트릭은 미리 인코딩된 JSON 바이트를 그대로 반환 (dict 생성/직렬화 생략)
+    return Response(content=get_health_status_bytes(), media_type="application/json")
 
 @router.get("/health/current_metrics", tags=["health"])
 def current_health_metrics():
@@ -32,7 +32,7 @@ def current_health_metrics():
     시스템의 현재 메트릭을 반환합니다.
     """
     return {
-        "current_metrics": health_monitor.get_current_metrics(),
+        "current_metrics": get_health_monitor().get_current_metrics(),
         "timestamp": datetime.now(KST).isoformat()
     }
 
@@ -44,6 +44,6 @@ def health_metrics():
     시스템의 헬스 메트릭을 반환합니다.
     """
     return {
-        "metrics": health_monitor.get_current_metrics(),
+        "metrics": get_health_monitor().get_current_metrics(),
         "timestamp": datetime.now(KST).isoformat()
     } 
\ No newline at end of file
@@ -8,7 +8,11 @@ from typing import List, Optional, Dict, Any, Union
 from pydantic import BaseModel, validator, Field, EmailStr
 from datetime import datetime, timezone
 from enum import Enum
-from app.core.config import validation_config
+from app.core.config import (
+    ALLOWED_FILE_EXTENSIONS,
+    COMMON_PASSWORD_PATTERNS,
+    DANGEROUS_FILENAME_CHARS,
+)
 import bleach
 
 from app.core.security import InputValidator, SecurityLevel
@@ -178,7 +182,7 @@ class FileUploadValidation(SecureBaseModel):
     def validate_filename(cls, v):
         """파일명 검증"""
         # 위험한 문자 제거
-        for char in validation_config.DANGEROUS_FILENAME_CHARS:
+        for char in DANGEROUS_FILENAME_CHARS:
             if char in v:
                 raise ValueError(f"파일명에 허용되지 않는 문자가 포함되어 있습니다: {char}")
         
@@ -188,7 +192,7 @@ class FileUploadValidation(SecureBaseModel):
         
         # 파일 확장자 검증
         file_ext = '.' + v.split('.')[-1].lower() if '.' in v else ''
-        if file_ext not in validation_config.ALLOWED_FILE_EXTENSIONS:
+        if file_ext not in ALLOWED_FILE_EXTENSIONS:
             raise ValueError(f"지원되지 않는 파일 형식입니다: {file_ext}")
         
         return v
@@ -250,7 +254,7 @@ class UserRegistration(SecureBaseModel):
             raise ValueError("비밀번호는 대문자, 소문자, 숫자, 특수문자 중 최소 3가지를 포함해야 합니다.")
         
         # 일반적인 패턴 차단
-        if any(pattern in v.lower() for pattern in validation_config.COMMON_PASSWORD_PATTERNS):
+        if any(pattern in v.lower() for pattern in COMMON_PASSWORD_PATTERNS):
             raise ValueError("일반적인 패턴의 비밀번호는 사용할 수 없습니다.")
         
         return v